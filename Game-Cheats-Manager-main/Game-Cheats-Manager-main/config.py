@@ -2,7 +2,7 @@ import gettext
 import json
 import locale
 import os
-import shutil
+import re
 import sys
 import tempfile
 
@@ -61,6 +61,8 @@ def load_settings():
         "showWarning": True,
         "downloadServer": "intl",
         "removeBgMusic": True,
+        "downloadWorkers": 3,
+        "downloadCacheSize": 512,
     }
 
     try:
@@ -111,10 +113,29 @@ def sort_trainers_key(name):
     return name
 
 
-def ensure_trainer_details_exist():
-    dst = os.path.join(DATABASE_PATH, "xgqdetail.json")
-    if not os.path.exists(dst):
-        shutil.copyfile(resource_path("dependency/xgqdetail.json"), dst)
+def arabic_to_roman(num):
+    if num == 0:
+        return '0'
+
+    numeral_map = [
+        (1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'),
+        (100, 'C'), (90, 'XC'), (50, 'L'), (40, 'XL'),
+        (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')
+    ]
+    roman = ''
+
+    while num > 0:
+        for i, r in numeral_map:
+            while num >= i:
+                roman += r
+                num -= i
+
+    return roman
+
+
+def sanitize(text):
+    text = re.sub(r'\d+', lambda x: arabic_to_roman(int(x.group())), text)
+    return re.sub(r"[\-\s\"'‘’“”:：.。,，()（）<>《》;；!！?？@#$%^&™®_+*=~`|]", "", text).lower()
 
 
 setting_path = os.path.join(
@@ -124,15 +145,13 @@ os.makedirs(setting_path, exist_ok=True)
 SETTINGS_FILE = os.path.join(setting_path, "settings.json")
 DATABASE_PATH = os.path.join(setting_path, "db")
 os.makedirs(DATABASE_PATH, exist_ok=True)
+CACHE_PATH = os.path.join(setting_path, "cache")
 DOWNLOAD_TEMP_DIR = os.path.join(tempfile.gettempdir(), "GameCheatsManagerTemp", "download")
-VERSION_TEMP_DIR = os.path.join(tempfile.gettempdir(), "GameCheatsManagerTemp", "version")
 WEMOD_TEMP_DIR = os.path.join(tempfile.gettempdir(), "GameCheatsManagerTemp", "wemod")
 
 settings = load_settings()
 tr = get_translator()
 
-ensure_trainer_details_exist()
-resourceHacker_path = resource_path("dependency/ResourceHacker.exe")
 unzip_path = resource_path("dependency/7z/7z.exe")
 binmay_path = resource_path("dependency/binmay.exe")
 emptyMidi_path = resource_path("dependency/TrainerBGM.mid")
@@ -152,3 +171,13 @@ server_options = {
     tr("International"): "intl",
     tr("China"): "china"
 }
+
+download_worker_options = ["1", "2", "3", "4", "5"]
+
+download_cache_options = {
+    tr("Disabled"): 0,
+    "256 MB": 256,
+    "512 MB": 512,
+    "1 GB": 1024,
+    "2 GB": 2048
+}
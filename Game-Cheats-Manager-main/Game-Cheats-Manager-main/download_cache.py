@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from config import *
+
+
+class DownloadCache:
+    """
+    Content-addressed store of downloaded archives and the trainer executables extracted from them.
+    Blobs live under blobs/ named by their sha256; index.json maps urls (with their HTTP validators)
+    and archive hashes onto blobs, and tracks access times for LRU eviction.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.blob_path = os.path.join(cache_path, "blobs")
+        self.index_file = os.path.join(cache_path, "index.json")
+        self.lock = threading.Lock()
+        os.makedirs(self.blob_path, exist_ok=True)
+        self.index = self.load_index()
+
+    def load_index(self):
+        index = {"urls": {}, "archives": {}, "blobs": {}}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print("Error loading download cache index: " + str(e))
+        return index
+
+    def save_index(self):
+        temp_file = self.index_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(temp_file, self.index_file)
+
+    def capacity(self):
+        return int(settings["downloadCacheSize"]) * 1024 * 1024
+
+    def blob_file(self, file_hash):
+        return os.path.join(self.blob_path, file_hash)
+
+    @staticmethod
+    def hash_file(file_path):
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    # ===========================================================================
+    # Downloaded archives
+    # ===========================================================================
+    def lookup(self, url):
+        # Returns {"hash", "extension", "etag", "last_modified"} for a cached url whose blob still exists
+        if self.capacity() <= 0:
+            return None
+        with self.lock:
+            entry = self.index["urls"].get(url)
+            if entry and self.touch(entry["hash"]):
+                return dict(entry)
+        return None
+
+    def validator_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, file_path, extension, response_headers=None, file_hash=None):
+        if self.capacity() <= 0:
+            return None
+
+        response_headers = response_headers or {}
+        file_hash = file_hash or self.hash_file(file_path)
+        with self.lock:
+            self.add_blob(file_path, file_hash)
+            self.index["urls"][url] = {
+                "hash": file_hash,
+                "extension": extension,
+                "etag": response_headers.get("ETag", ""),
+                "last_modified": response_headers.get("Last-Modified", ""),
+            }
+            self.evict()
+            self.save_index()
+        return file_hash
+
+    # ===========================================================================
+    # Extracted executables
+    # ===========================================================================
+    def lookup_extracted(self, archive_hash):
+        # Returns {"entries": [top level names], "members": {member name: blob hash}} if every blob is present
+        if self.capacity() <= 0:
+            return None
+        with self.lock:
+            entry = self.index["archives"].get(archive_hash)
+            if entry and all(self.touch(member_hash) for member_hash in entry["members"].values()):
+                return {"entries": list(entry["entries"]), "members": dict(entry["members"])}
+        return None
+
+    def store_extracted(self, archive_hash, entries, member_files):
+        if self.capacity() <= 0 or not archive_hash:
+            return
+
+        members = {name: self.hash_file(path) for name, path in member_files.items()}
+        with self.lock:
+            for name, path in member_files.items():
+                self.add_blob(path, members[name])
+            existing = self.index["archives"].get(archive_hash, {}).get("members", {})
+            self.index["archives"][archive_hash] = {"entries": entries, "members": {**existing, **members}}
+            self.evict()
+            self.save_index()
+
+    def copy_blob(self, file_hash, destination):
+        """
+        Copy a cached blob to destination under the lock, so another download's eviction can't remove it midway.
+        Returns False if the blob is gone after all (evicted since the lookup, or deleted by hand): a cache miss.
+        """
+        with self.lock:
+            try:
+                shutil.copyfile(self.blob_file(file_hash), destination)
+            except FileNotFoundError:
+                self.index["blobs"].pop(file_hash, None)
+                self.drop_references()
+                self.save_index()
+                return False
+            self.touch(file_hash)
+        return True
+
+    # ===========================================================================
+    # Internals, callers hold self.lock
+    # ===========================================================================
+    def touch(self, file_hash):
+        blob = self.index["blobs"].get(file_hash)
+        if blob is None or not os.path.exists(self.blob_file(file_hash)):
+            return False
+        blob["last_access"] = time.time()
+        return True
+
+    def add_blob(self, file_path, file_hash):
+        blob_file = self.blob_file(file_hash)
+        if not os.path.exists(blob_file):
+            temp_file = f"{blob_file}.{threading.get_ident()}.tmp"
+            shutil.copyfile(file_path, temp_file)
+            os.replace(temp_file, blob_file)
+        self.index["blobs"][file_hash] = {"size": os.path.getsize(blob_file), "last_access": time.time()}
+
+    def evict(self):
+        capacity = self.capacity()
+        blobs = self.index["blobs"]
+        total_size = sum(blob["size"] for blob in blobs.values())
+        for file_hash in sorted(blobs, key=lambda h: blobs[h]["last_access"]):
+            if total_size <= capacity:
+                break
+            total_size -= blobs.pop(file_hash)["size"]
+            try:
+                os.remove(self.blob_file(file_hash))
+            except OSError:
+                pass
+        self.drop_references()
+
+    def drop_references(self):
+        # Drop url and archive entries whose blobs are gone
+        blobs = self.index["blobs"]
+        self.index["urls"] = {url: entry for url, entry in self.index["urls"].items() if entry["hash"] in blobs}
+        self.index["archives"] = {
+            archive_hash: entry for archive_hash, entry in self.index["archives"].items()
+            if all(member_hash in blobs for member_hash in entry["members"].values())
+        }
+
+
+download_cache = DownloadCache(CACHE_PATH)
@@ -1,31 +1,42 @@
 import concurrent.futures
 import datetime
+import hashlib
+import heapq
 import json
-import locale
+import mmap
 import os
+import random
 import re
 import shutil
 import stat
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 from urllib.parse import urljoin, urlparse
-import uuid
 import winreg as reg
+import zipfile
 
 from bs4 import BeautifulSoup
-import cn2an
 from fuzzywuzzy import fuzz, process
-from PyQt6.QtCore import QEventLoop, Qt, QThread, QTimer, QUrl, pyqtSignal
+import pinyin
+from PyQt6.QtCore import QAbstractListModel, QFile, QFileSystemWatcher, QIODevice, QModelIndex, QObject, QSortFilterProxyModel, Qt, QThread, QTimer, QUrl, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QIcon, QPixmap
-from PyQt6.QtWebEngineCore import QWebEngineDownloadRequest
+from PyQt6.QtWebChannel import QWebChannel
+from PyQt6.QtWebEngineCore import QWebEngineDownloadRequest, QWebEngineScript
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWidgets import QCheckBox, QComboBox, QDialog, QHBoxLayout, QLabel, QMessageBox, QPushButton, QVBoxLayout, QWidget
+from PyQt6.QtWidgets import QCheckBox, QComboBox, QDialog, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QMessageBox, QPushButton, QVBoxLayout, QWidget
 import requests
 ts = None
 
 from config import *
 import db_additions
+from download_cache import download_cache
+from library_index import library_index
+from pe_resources import PEFile, read_version_strings, replace_resource_type
+from snapshot_store import snapshot_store
+from trainer_catalog import trainer_catalog
 
 
 class CopyRightWarning(QDialog):
@@ -137,6 +148,27 @@ class SettingsDialog(QDialog):
             self.find_settings_key(settings["downloadServer"], server_options))
         serverLayout.addWidget(self.serverCombo)
 
+        # Concurrent downloads
+        downloadWorkersLayout = QVBoxLayout()
+        downloadWorkersLayout.setSpacing(2)
+        settingsWidgetsLayout.addLayout(downloadWorkersLayout)
+        downloadWorkersLayout.addWidget(QLabel(tr("Concurrent Downloads:")))
+        self.downloadWorkersCombo = QComboBox()
+        self.downloadWorkersCombo.addItems(download_worker_options)
+        self.downloadWorkersCombo.setCurrentText(str(settings["downloadWorkers"]))
+        downloadWorkersLayout.addWidget(self.downloadWorkersCombo)
+
+        # Download cache size
+        downloadCacheLayout = QVBoxLayout()
+        downloadCacheLayout.setSpacing(2)
+        settingsWidgetsLayout.addLayout(downloadCacheLayout)
+        downloadCacheLayout.addWidget(QLabel(tr("Download Cache Size:")))
+        self.downloadCacheCombo = QComboBox()
+        self.downloadCacheCombo.addItems(download_cache_options.keys())
+        self.downloadCacheCombo.setCurrentText(
+            self.find_settings_key(settings["downloadCacheSize"], download_cache_options))
+        downloadCacheLayout.addWidget(self.downloadCacheCombo)
+
         # Always show english
         self.alwaysEnCheckbox = QCheckBox(tr("Always show search results in English"))
         self.alwaysEnCheckbox.setChecked(settings["enSearchResults"])
@@ -200,6 +232,8 @@ class SettingsDialog(QDialog):
         settings["autoUpdate"] = self.autoUpdateCheckbox.isChecked()
         settings["autoStart"] = self.autoStartCheckbox.isChecked()
         settings["downloadServer"] = server_options[self.serverCombo.currentText()]
+        settings["downloadWorkers"] = int(self.downloadWorkersCombo.currentText())
+        settings["downloadCacheSize"] = download_cache_options[self.downloadCacheCombo.currentText()]
         apply_settings(settings)
 
         if getattr(sys, 'frozen', False):
@@ -300,33 +334,338 @@ class AboutDialog(QDialog):
         self.setFixedSize(self.sizeHint())
 
 
+class DuplicateTrainersDialog(QDialog):
+    def __init__(self, groups, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(tr("Duplicate Trainers"))
+        self.setWindowIcon(QIcon(resource_path("assets/logo.ico")))
+        self.setMinimumSize(560, 360)
+        duplicatesLayout = QVBoxLayout()
+        duplicatesLayout.setSpacing(15)
+        duplicatesLayout.setContentsMargins(30, 20, 30, 20)
+        self.setLayout(duplicatesLayout)
+
+        # Identical copies are selected by default; older builds may be kept on purpose for other game versions
+        self.duplicatesList = QListWidget()
+        self.reclaimable = 0
+        for kind, kept, removable in groups:
+            keptName = os.path.splitext(os.path.basename(kept["path"]))[0]
+            for info in removable:
+                name = os.path.splitext(os.path.basename(info["path"]))[0]
+                if kind == "duplicate":
+                    text = f"{name} ({self.format_size(info['size'])}) - " + tr("identical to") + f" {keptName}"
+                else:
+                    text = f"{name} ({info['build_date']}) - " + tr("superseded by") + f" {keptName} ({kept['build_date']})"
+                item = QListWidgetItem(text)
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(Qt.CheckState.Checked if kind == "duplicate" else Qt.CheckState.Unchecked)
+                item.setData(Qt.ItemDataRole.UserRole, info)
+                self.duplicatesList.addItem(item)
+                self.reclaimable += info["size"]
+        self.duplicatesList.itemChanged.connect(self.update_space_label)
+        duplicatesLayout.addWidget(self.duplicatesList)
+
+        self.spaceLabel = QLabel()
+        duplicatesLayout.addWidget(self.spaceLabel)
+        self.update_space_label()
+
+        buttonsLayout = QHBoxLayout()
+        buttonsLayout.setSpacing(10)
+        duplicatesLayout.addLayout(buttonsLayout)
+        self.cleanUpButton = QPushButton(tr("Clean Up"))
+        self.cleanUpButton.clicked.connect(self.clean_up)
+        buttonsLayout.addWidget(self.cleanUpButton)
+        cancelButton = QPushButton(tr("Cancel"))
+        cancelButton.clicked.connect(self.reject)
+        buttonsLayout.addWidget(cancelButton)
+
+        if not groups:
+            self.duplicatesList.addItem(tr("No duplicate trainers found."))
+            self.cleanUpButton.setEnabled(False)
+
+    def format_size(self, size):
+        return f"{size / 1024 / 1024:.1f} MB"
+
+    def checked_items(self):
+        items = (self.duplicatesList.item(row) for row in range(self.duplicatesList.count()))
+        return [item for item in items if item.checkState() == Qt.CheckState.Checked]
+
+    def update_space_label(self):
+        selected = sum(item.data(Qt.ItemDataRole.UserRole)["size"] for item in self.checked_items())
+        self.spaceLabel.setText(tr("Reclaimable space: ") + self.format_size(self.reclaimable) + "    " + tr("Selected: ") + self.format_size(selected))
+
+    def clean_up(self):
+        for item in self.checked_items():
+            trainerPath = item.data(Qt.ItemDataRole.UserRole)["path"]
+            try:
+                os.chmod(trainerPath, stat.S_IWRITE)
+                os.remove(trainerPath)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                QMessageBox.critical(self, tr("Failure"), tr("Failed to delete trainer: ") + f"{trainerPath}\n{str(e)}")
+        self.accept()
+
+
 class PathChangeThread(QThread):
+    """
+    Moves the trainer library to a new folder as a whole.
+    On the same volume entries are renamed; across volumes files are copied in parallel into a staging folder,
+    verified by checksum and then committed. Any failure rolls back, leaving the source library untouched.
+    """
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    progress = pyqtSignal(int)
+
+    copy_workers = 4
+    chunk_size = 1024 * 1024
 
     def __init__(self, source_path, destination_folder, parent=None):
         super().__init__(parent)
         self.source_path = source_path
         self.destination_folder = destination_folder
+        self.total_bytes = 0
+        self.copied_bytes = 0
+        self.last_percent = -1
+        self.progress_lock = threading.Lock()
+        self.failed_event = threading.Event()
 
     def run(self):
         try:
             dst = os.path.normpath(os.path.join(self.destination_folder, "GCM Trainers/"))
-            if not os.path.exists(dst):
-                os.makedirs(dst)
+            if os.path.normcase(dst).startswith(os.path.normcase(os.path.normpath(self.source_path)) + os.sep):
+                raise ValueError(tr("The new path is inside the current trainer folder."))
+
+            os.makedirs(self.destination_folder, exist_ok=True)
+            if os.stat(self.source_path).st_dev == os.stat(self.destination_folder).st_dev:
+                self.rename_library(dst)
+            else:
+                self.copy_library(dst)
+
+            self.finished.emit(dst)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def rename_library(self, dst):
+        # Same volume: a single directory rename, or an entry by entry merge into an existing folder
+        if not os.path.exists(dst):
+            os.rename(self.source_path, dst)
+            self.progress.emit(100)
+            return
 
+        backup = tempfile.mkdtemp(prefix=".gcm_backup_", dir=dst)
+        moved, replaced = [], []
+        try:
             for filename in os.listdir(self.source_path):
-                src_file = os.path.join(self.source_path, filename)
                 dst_file = os.path.join(dst, filename)
-                os.chmod(src_file, stat.S_IWRITE)
                 if os.path.exists(dst_file):
-                    os.chmod(dst, stat.S_IWRITE)
-                shutil.move(src_file, dst_file)
-            shutil.rmtree(self.source_path)
+                    os.replace(dst_file, os.path.join(backup, filename))
+                    replaced.append(filename)
+                os.rename(os.path.join(self.source_path, filename), dst_file)
+                moved.append(filename)
+        except Exception:
+            for filename in reversed(moved):
+                self.rollback_step(os.rename, os.path.join(dst, filename), os.path.join(self.source_path, filename))
+            for filename in replaced:
+                self.rollback_step(os.replace, os.path.join(backup, filename), os.path.join(dst, filename))
+            raise
+        finally:
+            self.remove_tree(backup)
+
+        self.remove_tree(self.source_path)
+        self.progress.emit(100)
+
+    def copy_library(self, dst):
+        # Another volume: copy into staging, then commit with renames inside the destination volume
+        files = []  # relative paths
+        for root, dirs, filenames in os.walk(self.source_path):
+            for filename in filenames:
+                src_file = os.path.join(root, filename)
+                files.append(os.path.relpath(src_file, self.source_path))
+                self.total_bytes += os.path.getsize(src_file)
+
+        os.makedirs(dst, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".gcm_migration_", dir=dst)
+        backup = tempfile.mkdtemp(prefix=".gcm_backup_", dir=dst)
+        committed, replaced = [], []
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.copy_workers) as executor:
+                futures = [executor.submit(self.copy_verified, os.path.join(self.source_path, rel), os.path.join(staging, rel)) for rel in files]
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception:
+                        self.failed_event.set()
+                        raise
+
+            for rel in files:
+                dst_file = os.path.join(dst, rel)
+                os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+                if os.path.exists(dst_file):
+                    os.makedirs(os.path.dirname(os.path.join(backup, rel)), exist_ok=True)
+                    os.replace(dst_file, os.path.join(backup, rel))
+                    replaced.append(rel)
+                os.replace(os.path.join(staging, rel), dst_file)
+                committed.append(rel)
+        except Exception:
+            for rel in committed:
+                self.rollback_step(os.remove, os.path.join(dst, rel))
+            for rel in replaced:
+                self.rollback_step(os.replace, os.path.join(backup, rel), os.path.join(dst, rel))
+            raise
+        finally:
+            self.remove_tree(staging)
+            self.remove_tree(backup)
+
+        self.remove_tree(self.source_path)
+
+    def copy_verified(self, src_file, dst_file):
+        os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+        source_hash = hashlib.sha256()
+        with open(src_file, "rb") as src, open(dst_file, "wb") as dst:
+            for chunk in iter(lambda: src.read(self.chunk_size), b""):
+                if self.failed_event.is_set():
+                    raise RuntimeError("Migration aborted")
+                source_hash.update(chunk)
+                dst.write(chunk)
+                self.report_progress(len(chunk))
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        if download_cache.hash_file(dst_file) != source_hash.hexdigest():
+            raise IOError(f"Checksum mismatch after copying {src_file}")
+        shutil.copystat(src_file, dst_file)
+
+    def report_progress(self, size):
+        with self.progress_lock:
+            self.copied_bytes += size
+            percent = int(self.copied_bytes * 100 / self.total_bytes) if self.total_bytes else 100
+            if percent == self.last_percent:
+                return
+            self.last_percent = percent
+        self.progress.emit(percent)
 
-            self.finished.emit(dst)
+    @staticmethod
+    def rollback_step(func, path, *args):
+        # Best effort: copies keep the source's read-only flag, clear it first; a failed step is logged and the
+        # rollback goes on, so the caller still re-raises the error that caused it
+        try:
+            os.chmod(path, os.stat(path).st_mode | stat.S_IWRITE)
+            func(path, *args)
+        except OSError as e:
+            print(f"Error rolling back {path}: {str(e)}")
+
+    def remove_tree(self, path):
+        # Trainers are often read-only, clear the flag and retry
+        def on_error(func, failed_path, exc_info):
+            os.chmod(failed_path, stat.S_IWRITE)
+            func(failed_path)
+
+        try:
+            shutil.rmtree(path, onerror=on_error)
+        except OSError as e:
+            print(f"Error removing {path}: {str(e)}")
+
+
+class ImportTrainersThread(QThread):
+    """
+    Copies trainers into the library in the background, hashing each file while it streams.
+    Content already in the library (under any name) is skipped, and a different trainer whose name is taken
+    is imported under a numbered name instead of overwriting it.
+    """
+    message = pyqtSignal(str, str)
+    error = pyqtSignal(str, str)
+    finished = pyqtSignal(list)
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, file_names, trainerDownloadPath, parent=None):
+        super().__init__(parent)
+        self.file_names = file_names
+        self.trainerDownloadPath = trainerDownloadPath
+
+    def run(self):
+        handled = []  # source files now present in the library, safe to delete
+        try:
+            self.message.emit(tr("Importing trainers..."), None)
+            known = self.library_hashes()
+            imported = 0
+
+            for file_name in self.file_names:
+                try:
+                    dst_path, existing = self.import_file(file_name, known)
+                except Exception as e:
+                    self.error.emit(file_name, str(e))
+                    continue
+
+                handled.append(file_name)
+                if existing:
+                    self.message.emit(tr("Already in library, skipped: ") + os.path.splitext(os.path.basename(existing))[0], None)
+                else:
+                    imported += 1
+                    print("Trainer copied: ", file_name)
+
+            self.message.emit(tr("Imported trainers: ") + str(imported), "success")
         except Exception as e:
-            self.error.emit(str(e))
+            # E.g. the library index failing, reported against the library folder
+            self.error.emit(self.trainerDownloadPath, str(e))
+        finally:
+            # Always sent, the library stays paused until the import reports back
+            self.finished.emit(handled)
+
+    def library_hashes(self):
+        # {content hash: path} of the library; only files whose size matches an import are hashed if not known yet
+        import_sizes = {os.path.getsize(file_name) for file_name in self.file_names if os.path.isfile(file_name)}
+        known = {}
+        for path, size, mtime_ns, content_hash in library_index.library_hashes(self.trainerDownloadPath):
+            if content_hash is None and size in import_sizes:
+                try:
+                    file_stat = os.stat(path)
+                    content_hash = download_cache.hash_file(path)
+                    library_index.record_hash(path, file_stat, content_hash)
+                except OSError:
+                    continue
+            if content_hash:
+                known[content_hash] = path
+        return known
+
+    def import_file(self, file_name, known):
+        # Returns (imported path, None), or (None, existing library path) for duplicate content
+        fd, temp_path = tempfile.mkstemp(prefix=".gcm_import_", suffix=".tmp", dir=self.trainerDownloadPath)
+        try:
+            sha256 = hashlib.sha256()
+            with os.fdopen(fd, "wb") as dst, open(file_name, "rb") as src:
+                for chunk in iter(lambda: src.read(self.chunk_size), b""):
+                    sha256.update(chunk)
+                    dst.write(chunk)
+            content_hash = sha256.hexdigest()
+
+            existing = known.get(content_hash)
+            if existing and os.path.exists(existing):
+                os.remove(temp_path)
+                return None, existing
+
+            shutil.copymode(file_name, temp_path)
+            dst_path = self.free_path(os.path.basename(file_name))
+            os.replace(temp_path, dst_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.chmod(temp_path, stat.S_IWRITE)
+                os.remove(temp_path)
+            raise
+
+        known[content_hash] = dst_path
+        library_index.record_hash(dst_path, os.stat(dst_path), content_hash)
+        return dst_path, None
+
+    def free_path(self, filename):
+        name, ext = os.path.splitext(filename)
+        dst_path = os.path.join(self.trainerDownloadPath, filename)
+        count = 2
+        while os.path.exists(dst_path):
+            dst_path = os.path.join(self.trainerDownloadPath, f"{name} ({count}){ext}")
+            count += 1
+        return dst_path
 
 
 class StatusMessageWidget(QWidget):
@@ -368,9 +707,335 @@ class StatusMessageWidget(QWidget):
             self.messageLabel.setStyleSheet("QLabel { color: red; }")
 
 
+class TrainerListModel(QAbstractListModel):
+    """
+    Installed trainers as rows of (name, path, size, mtime, sort key), shown by name.
+    """
+    PathRole = Qt.ItemDataRole.UserRole
+    SortKeyRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name, path, size, mtime, sort_key = self.entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == self.PathRole:
+            return path
+        if role == self.SortKeyRole:
+            return sort_key
+        return None
+
+    def set_entries(self, entries):
+        # entries: [(name, path, size, mtime, sort key)], sort keys come precomputed from the library index
+        self.beginResetModel()
+        self.entries = list(entries)
+        self.endResetModel()
+
+    def row_of(self, path):
+        key = os.path.normcase(path)
+        for row, entry in enumerate(self.entries):
+            if os.path.normcase(entry[1]) == key:
+                return row
+        return -1
+
+    def add_entry(self, name, path, size, mtime, sort_key):
+        row = len(self.entries)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.entries.append((name, path, size, mtime, sort_key))
+        self.endInsertRows()
+
+    def remove_entry(self, path):
+        row = self.row_of(path)
+        if row != -1:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.entries[row]
+            self.endRemoveRows()
+
+    def update_entry(self, old_path, name, path, size, mtime, sort_key):
+        # Changed or renamed file, updated in place so selection and scroll position survive
+        row = self.row_of(old_path)
+        if row != -1:
+            self.entries[row] = (name, path, size, mtime, sort_key)
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def trainers(self):
+        return {name: path for name, path, *_ in self.entries}
+
+
+class TrainerLibrary(QObject):
+    """
+    Keeps a TrainerListModel and the library index in sync with the trainer folder by applying add, remove,
+    rename and change deltas. Watcher notifications are coalesced into one diff of (name, size, mtime) snapshots;
+    a periodic diff catches anything the watcher misses, such as changes on network drives.
+    The list is first painted from the library index, the folder is only scanned afterwards. Index writes, and the
+    hashing that confirms renames, run in order on a single writer thread so the GUI never waits on them.
+    """
+    trainersChanged = pyqtSignal()
+    coalesce_delay = 300  # ms
+    snapshot_interval = 60000  # ms
+
+    def __init__(self, model, path, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.path = ""
+        self.snapshot = {}  # {normcased path: (name, path, size, mtime_ns)}
+        self.sortKeys = {}  # {trainer name: collation key}
+        self.paused = 0
+        self.index_writer = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_refresh)
+        self.coalesce_timer = QTimer(self)
+        self.coalesce_timer.setSingleShot(True)
+        self.coalesce_timer.timeout.connect(self.refresh)
+        self.snapshot_timer = QTimer(self)
+        self.snapshot_timer.timeout.connect(self.refresh)
+
+        self.set_path(path)
+
+    def set_path(self, path):
+        self.suspend()
+        self.path = path
+        self.watcher.addPath(path)
+        self.snapshot_timer.start(self.snapshot_interval)
+
+        indexed = library_index.list_trainers(path)
+        self.sortKeys = {name: sort_key for name, _, _, _, sort_key in indexed if sort_key is not None}
+        self.snapshot = {os.path.normcase(entry[1]): entry[:4] for entry in indexed}
+        self.model.set_entries([self.with_sort_key(entry) for entry in self.snapshot.values()])
+        self.trainersChanged.emit()
+        QTimer.singleShot(0, self.refresh)
+
+    def suspend(self):
+        # Stop tracking the folder, e.g. while a migration moves it away
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.coalesce_timer.stop()
+        self.snapshot_timer.stop()
+        # Pending writes must land before the folder's rows are reloaded or moved
+        self.index_writer.submit(lambda: None).result()
+
+    def pause(self):
+        # Hold back diffs during bulk operations, resume applies everything as one batch
+        self.paused += 1
+
+    def resume(self):
+        self.paused -= 1
+        if not self.paused:
+            self.refresh()
+
+    def with_sort_key(self, entry):
+        name = entry[0]
+        if name not in self.sortKeys:
+            self.sortKeys[name] = sort_trainers_key(name)
+        return (*entry, self.sortKeys[name])
+
+    def schedule_refresh(self):
+        # Restarting the timer folds a burst of notifications into a single diff
+        self.coalesce_timer.start(self.coalesce_delay)
+
+    def scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.path) as it:
+                for trainer in it:
+                    trainerName, trainerExt = os.path.splitext(trainer.name)
+                    if trainerExt.lower() != ".exe" or not trainer.is_file():
+                        continue
+                    # On Windows scandir already carries the stat data, no extra call per file
+                    trainerStat = trainer.stat()
+                    if trainerStat.st_size != 0:
+                        trainerPath = os.path.normpath(trainer.path)
+                        snapshot[os.path.normcase(trainerPath)] = (trainerName, trainerPath, trainerStat.st_size, trainerStat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error scanning {self.path}: {str(e)}")
+            return self.snapshot
+        return snapshot
+
+    def refresh(self):
+        if self.paused:
+            return
+
+        current = self.scan()
+        if current == self.snapshot:
+            return
+
+        removed = {key: entry for key, entry in self.snapshot.items() if key not in current}
+        added = {key: entry for key, entry in current.items() if key not in self.snapshot}
+        changed = {key: entry for key, entry in current.items() if key in self.snapshot and self.snapshot[key] != entry}
+
+        # A rename keeps size and mtime, update that row instead of removing and re-adding it. Several trainers can
+        # share both, so this pairing is only good enough for the list; sync_index confirms it by content hash
+        candidates = []
+        removedByStat = {}
+        for key, entry in removed.items():
+            removedByStat.setdefault((entry[2], entry[3]), []).append(key)
+        for key, entry in list(added.items()):
+            oldKeys = removedByStat.get((entry[2], entry[3]))
+            if oldKeys:
+                oldEntry = removed.pop(oldKeys.pop(0))
+                self.model.update_entry(oldEntry[1], *self.with_sort_key(entry))
+                candidates.append((oldEntry, self.with_sort_key(added.pop(key))))
+
+        if not self.snapshot:
+            # Nothing indexed yet (first run or new folder), one reset beats a row insert per trainer
+            self.model.set_entries([self.with_sort_key(entry) for entry in current.values()])
+        else:
+            for entry in removed.values():
+                self.model.remove_entry(entry[1])
+            for entry in added.values():
+                self.model.add_entry(*self.with_sort_key(entry))
+            for entry in changed.values():
+                self.model.update_entry(entry[1], *self.with_sort_key(entry))
+
+        self.index_writer.submit(
+            self.sync_index,
+            [self.with_sort_key(entry) for entry in [*added.values(), *changed.values()]],
+            [entry[1] for entry in removed.values()],
+            candidates
+        )
+        self.snapshot = current
+        self.trainersChanged.emit()
+
+    @staticmethod
+    def sync_index(upserts, removed, candidates):
+        """
+        Runs on the index writer. A rename candidate only takes over the old row, with its analysis and install
+        date, when the new file hashes to the content hash stored for the old path; unconfirmed candidates are
+        indexed as a removal plus an addition, so same-sized trainers copied in together can't swap metadata.
+        """
+        oldPaths = {}  # {stored content hash: old path}
+        stored = library_index.stored_hashes([oldEntry[1] for oldEntry, _ in candidates])
+        for oldEntry, _ in candidates:
+            size, mtime_ns, content_hash = stored.get(os.path.normcase(oldEntry[1]), (None, None, None))
+            # A hash taken before the file last changed no longer describes it
+            if (size, mtime_ns) == (oldEntry[2], oldEntry[3]):
+                oldPaths[content_hash] = oldEntry[1]
+
+        renamed = []
+        for _, newEntry in candidates:
+            try:
+                content_hash = download_cache.hash_file(newEntry[1]) if oldPaths else None
+            except OSError:
+                content_hash = None
+            oldPath = oldPaths.pop(content_hash, None)
+            if oldPath is not None:
+                renamed.append((oldPath, newEntry[1]))
+        renamedFrom = {oldPath for oldPath, _ in renamed}
+
+        try:
+            library_index.sync_trainers(
+                upserts=[*upserts, *(newEntry for _, newEntry in candidates)],
+                removed=[*removed, *(oldEntry[1] for oldEntry, _ in candidates if oldEntry[1] not in renamedFrom)],
+                renamed=renamed
+            )
+        except Exception as e:
+            print(f"Error updating the library index: {str(e)}")
+
+
+class TrainerFilterProxyModel(QSortFilterProxyModel):
+    """
+    Filters installed trainers by plain substring, sanitized English, pinyin, pinyin initials (e.g. "ggbh" for 鬼谷八荒),
+    and with some typo tolerance on the name and full pinyin for queries of fuzzy_min_length characters or more;
+    initials must match exactly. Search keys are computed once per trainer name and reused for every keystroke.
+    """
+    fuzzy_min_length = 4
+    fuzzy_threshold = 80
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(TrainerListModel.SortKeyRole)
+        self.setDynamicSortFilter(True)
+        self.query = ""
+        self.sanitizedQuery = ""
+        self.searchKeys = {}  # {trainer name: (lowercase name, sanitized keys for substring, keys for fuzzy matching)}
+
+    def set_query(self, text):
+        self.query = text.strip().lower()
+        self.sanitizedQuery = DownloadBaseThread.sanitize(self.query)
+        self.invalidateFilter()
+
+    def search_keys(self, name):
+        keys = self.searchKeys.get(name)
+        if keys is None:
+            sanitizedName = DownloadBaseThread.sanitize(name)
+            exactKeys = [sanitizedName]
+            fuzzyKeys = [sanitizedName]
+            if is_chinese(name):
+                fullPinyin = DownloadBaseThread.sanitize(pinyin.get(name, format="strip", delimiter=""))
+                exactKeys += [fullPinyin, DownloadBaseThread.sanitize(pinyin.get_initial(name, delimiter=""))]
+                fuzzyKeys.append(fullPinyin)
+            keys = self.searchKeys[name] = (name.lower(), exactKeys, fuzzyKeys)
+        return keys
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        if not self.query:
+            return True
+
+        name = self.sourceModel().index(sourceRow, 0, sourceParent).data()
+        lowerName, exactKeys, fuzzyKeys = self.search_keys(name)
+        if self.query in lowerName:
+            return True
+        if not self.sanitizedQuery:
+            return False
+        if any(self.sanitizedQuery in key for key in exactKeys):
+            return True
+        if len(self.sanitizedQuery) >= self.fuzzy_min_length:
+            return any(fuzz.partial_ratio(self.sanitizedQuery, key) >= self.fuzzy_threshold for key in fuzzyKeys)
+        return False
+
+
+class PageReadyBridge(QObject):
+    ready = pyqtSignal(str)
+
+    @pyqtSlot(str)
+    def contentFound(self, html):
+        self.ready.emit(html)
+
+
 class BrowserDialog(QDialog):
     content_ready = pyqtSignal(str)
     download_completed = pyqtSignal(str)
+    download_progress = pyqtSignal(int)
+    visibility_changed = pyqtSignal(bool)
+
+    # Injected into every page load, reports back through the web channel as soon as target text shows up in the DOM
+    ready_script_name = "gcmPageReady"
+    ready_script = """
+    (function() {
+        var target = %s;
+        new QWebChannel(qt.webChannelTransport, function(channel) {
+            var bridge = channel.objects.pageBridge;
+            var observer = null;
+            function check() {
+                var root = document.documentElement;
+                if (!root || (root.textContent.indexOf(target) === -1 && document.title.indexOf(target) === -1)) {
+                    return false;
+                }
+                if (observer) {
+                    observer.disconnect();
+                }
+                bridge.contentFound("<!DOCTYPE html>" + root.outerHTML);
+                return true;
+            }
+            if (!check()) {
+                observer = new MutationObserver(check);
+                observer.observe(document, {childList: true, subtree: true, characterData: true});
+            }
+        });
+    })();
+    """
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -382,50 +1047,93 @@ class BrowserDialog(QDialog):
         self.setWindowTitle(tr("Please complete any security checks") + "/" + tr("Unable to access webpage"))
         self.setWindowIcon(QIcon(resource_path("assets/logo.ico")))
 
-        self.check_timer = QTimer(self)
+        self.bridge = PageReadyBridge(self)
+        self.bridge.ready.connect(self.on_content_found)
+        self.channel = QWebChannel(self)
+        self.channel.registerObject("pageBridge", self.bridge)
+        self.browser.page().setWebChannel(self.channel, QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        self.webchannel_js = self.read_webchannel_js()
+
+        # Only reveal the dialog when the page takes a while, most likely because of a security check
+        self.reveal_timer = QTimer(self)
+        self.reveal_timer.setSingleShot(True)
+        self.reveal_timer.timeout.connect(self.show)
+        self.reveal_delay = 2500
         self.found_content = None
-        self.check_count = 0
+        self.awaiting_download = False
+        self.pending_download = None
         self.download_path = ""
         self.file_name = ""
 
+    def read_webchannel_js(self):
+        webchannel_file = QFile(":/qtwebchannel/qwebchannel.js")
+        if not webchannel_file.open(QIODevice.OpenModeFlag.ReadOnly):
+            print("Could not load qwebchannel.js, page readiness detection unavailable")
+            return ""
+        content = bytes(webchannel_file.readAll()).decode("utf-8")
+        webchannel_file.close()
+        return content
+
+    def install_ready_script(self, target_text):
+        scripts = self.browser.page().scripts()
+        for script in scripts.find(self.ready_script_name):
+            scripts.remove(script)
+
+        script = QWebEngineScript()
+        script.setName(self.ready_script_name)
+        script.setSourceCode(self.webchannel_js + self.ready_script % json.dumps(target_text))
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+        script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        script.setRunsOnSubFrames(False)
+        scripts.insert(script)
+
     def load_url(self, url, target_text):
         self.url = url
         self.target_text = target_text
         self.found_content = False
-        self.check_count = 0
-        self.browser.loadFinished.connect(self.on_load_finished)
+        self.install_ready_script(target_text)
         self.browser.load(QUrl(self.url))
         self.hide()
+        self.reveal_timer.start(self.reveal_delay)
+
+    def on_content_found(self, html):
+        # Handle only the first report for the current load
+        if self.found_content is not False or self.target_text not in html:
+            return
+        self.found_content = True
+        self.reveal_timer.stop()
+        self.content_ready.emit(html)
+        self.close()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.visibility_changed.emit(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.visibility_changed.emit(False)
 
-    def on_load_finished(self, success):
-        self.check_timer.timeout.connect(self.check_content)
-        self.check_timer.start(500)
-
-    def check_content(self):
-        if self.check_count >= 5:
-            self.show()
-        self.check_count += 1
-        self.browser.page().toHtml(self.handle_html)
-
-    def handle_html(self, html):
-        if self.target_text in html:
-            self.found_content = True
-            self.check_timer.stop()
-            self.content_ready.emit(html)
-            self.close()
-    
     def closeEvent(self, event):
-        if not self.found_content == None and not self.found_content:
-            self.check_timer.stop()
-            self.browser.loadFinished.disconnect(self.on_load_finished)
+        if self.found_content is False:
+            self.found_content = None
+            self.reveal_timer.stop()
+            self.browser.stop()
             self.content_ready.emit("")
+        if self.awaiting_download:
+            # Download was cancelled or the dialog closed before it completed
+            download = self.pending_download
+            self.finish_download("")
+            if download:
+                download.cancel()
         event.accept()
     
     def handle_download(self, url, download_path, file_name):
         self.download_path = download_path
         self.file_name = file_name
+        self.awaiting_download = True
         self.browser.page().profile().downloadRequested.connect(self.on_download_requested)
         self.browser.load(QUrl(url))
+        self.reveal_timer.start(self.reveal_delay)
 
     def on_download_requested(self, download):
         suggested_filename = download.downloadFileName()
@@ -435,23 +1143,113 @@ class BrowserDialog(QDialog):
         download.setDownloadDirectory(self.download_path)
         download.setDownloadFileName(file_name)
         download.accept()
+        self.pending_download = download
 
         file_path = os.path.join(self.download_path, file_name)
         download.stateChanged.connect(lambda state: self.on_download_state_changed(state, file_path))
+        download.receivedBytesChanged.connect(lambda: self.on_download_progress(download))
+
+    def on_download_progress(self, download):
+        if download.totalBytes() > 0:
+            self.download_progress.emit(int(download.receivedBytes() * 100 / download.totalBytes()))
     
     def on_download_state_changed(self, state, file_path):
         if state == QWebEngineDownloadRequest.DownloadState.DownloadCompleted:
-            self.browser.page().profile().downloadRequested.disconnect(self.on_download_requested)
-            self.download_completed.emit(file_path)
-            self.close()
+            self.finish_download(file_path)
+        elif state in (QWebEngineDownloadRequest.DownloadState.DownloadCancelled, QWebEngineDownloadRequest.DownloadState.DownloadInterrupted):
+            print(f"Browser download of {file_path} did not complete")
+            self.finish_download("")
+
+    def finish_download(self, file_path):
+        # Signal completion exactly once per handle_download() call
+        if not self.awaiting_download:
+            return
+        self.awaiting_download = False
+        self.reveal_timer.stop()
+        self.browser.page().profile().downloadRequested.disconnect(self.on_download_requested)
+        self.pending_download = None
+        self.download_completed.emit(file_path)
+        self.close()
+
+
+class DownloadWorkspace:
+    """
+    Private temp folder of a single download job, removed automatically once the job ends.
+    Layout: archive/ for downloaded files, extract/ for decompressed contents.
+    """
+    active_paths = set()
+    active_lock = threading.Lock()
+    kept_lifetime = 86400  # seconds to keep folders the user was pointed to, e.g. anti-cheat files
+
+    def __init__(self):
+        os.makedirs(DOWNLOAD_TEMP_DIR, exist_ok=True)
+        self.root = tempfile.mkdtemp(prefix="job_", dir=DOWNLOAD_TEMP_DIR)
+        self.archive_dir = os.path.join(self.root, "archive")
+        self.extract_dir = os.path.join(self.root, "extract")
+        for folder in (self.archive_dir, self.extract_dir):
+            os.makedirs(folder)
+        self.kept = []
+        with DownloadWorkspace.active_lock:
+            DownloadWorkspace.active_paths.add(self.root)
+
+    def extract_path(self, *parts):
+        return os.path.join(self.extract_dir, *parts)
+
+    def keep(self, folder):
+        # Preserve a top level folder past cleanup so the user can inspect it, swept later by sweep_stale()
+        self.kept.append(os.path.normpath(folder))
+
+    def cleanup(self):
+        with DownloadWorkspace.active_lock:
+            DownloadWorkspace.active_paths.discard(self.root)
+
+        if not self.kept:
+            shutil.rmtree(self.root, ignore_errors=True)
+            return
+
+        for entry in os.scandir(self.root):
+            if os.path.normpath(entry.path) in self.kept:
+                continue
+            try:
+                if entry.is_dir():
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+            except OSError as e:
+                print(f"Error cleaning up {entry.path}: {str(e)}")
+
+    @classmethod
+    def sweep_stale(cls):
+        # Remove workspaces left behind by crashed or previous sessions that no running job owns
+        if not os.path.exists(DOWNLOAD_TEMP_DIR):
+            return
+
+        with cls.active_lock:
+            active = set(cls.active_paths)
+
+        now = time.time()
+        for entry in os.scandir(DOWNLOAD_TEMP_DIR):
+            if entry.path in active:
+                continue
+            try:
+                if entry.is_dir() and entry.name.startswith("job_") and now - entry.stat().st_mtime < cls.kept_lifetime:
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                pass
 
 
 class DownloadBaseThread(QThread):
     message = pyqtSignal(str, str)
     messageBox = pyqtSignal(str, str, str)
     finished = pyqtSignal(int)
+    progress = pyqtSignal(int)
     loadUrl = pyqtSignal(str, str)
     downloadFile = pyqtSignal(str, str, str)
+    closeBrowser = pyqtSignal()
 
     trainer_urls = {}  # For intl download server: {trainer name: download link}; for china download server: {trainer name: [download link, anti-cheats download link]}
     headers = {
@@ -459,16 +1257,29 @@ class DownloadBaseThread(QThread):
     }
     translator_initializing = False
     translator_warnings_displayed = False  # make sure warning doesn't display more than once
+    browser_timeout = 120  # seconds the hidden browser fallback may go without loading, delivering the page or download progress
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.html_content = ""
         self.downloaded_file_path = ""
+        self.downloaded_file_hash = ""
+        self.cancel_event = threading.Event()
+        self.content_event = threading.Event()
+        self.download_event = threading.Event()
+        self.browser_lock = threading.Lock()
         self.browser_dialog = BrowserDialog()
         self.loadUrl.connect(self.browser_dialog.load_url)
         self.browser_dialog.content_ready.connect(self.handle_content_ready)
         self.downloadFile.connect(self.browser_dialog.handle_download)
         self.browser_dialog.download_completed.connect(self.handle_download_completed)
+        self.browser_dialog.download_progress.connect(self.progress)
+        self.browser_dialog.download_progress.connect(self.handle_browser_activity)
+        self.browser_dialog.browser.loadProgress.connect(self.handle_browser_activity)
+        self.browser_dialog.visibility_changed.connect(self.handle_browser_visibility)
+        self.closeBrowser.connect(self.browser_dialog.close)
+        self.browser_activity = 0
+        self.browser_visible = False
 
     def get_webpage_content(self, url, target_text):
         if not self.is_internet_connected():
@@ -480,44 +1291,135 @@ class DownloadBaseThread(QThread):
             print(f"Error requesting {url}: {str(e)}")
             return ""
 
-        if req.status_code != 200:
-            self.loop = QEventLoop()
-            self.loadUrl.emit(url, target_text)
-            self.loop.exec()
-        else:
+        if req.status_code == 200:
             self.html_content = req.text
+            return req.text
 
-        return self.html_content
+        # The browser fallback and content_event are per thread, serialize callers running on worker threads
+        with self.browser_lock:
+            self.content_event.clear()
+            self.loadUrl.emit(url, target_text)
+            if not self.wait_for_browser(self.content_event):
+                return ""
+            return self.html_content
+
+    def wait_for_browser(self, event):
+        """
+        Wait for the browser fallback to set event. Gives up after browser_timeout seconds without page loads, the page
+        or any download progress, closing the browser so the job fails instead of holding its download slot; returns
+        False then. Time the dialog is shown doesn't count, the user may be working through a security check and can
+        close it to give up.
+        """
+        self.browser_activity = time.monotonic()
+        while not event.wait(1):
+            if not self.browser_visible and time.monotonic() - self.browser_activity > self.browser_timeout:
+                print(f"Browser fallback timed out after {self.browser_timeout} seconds without progress")
+                self.closeBrowser.emit()
+                return False
+        return True
+
+    def handle_browser_activity(self, progress):
+        self.browser_activity = time.monotonic()
+
+    def handle_browser_visibility(self, visible):
+        # The timeout restarts once the dialog is hidden again
+        self.browser_visible = visible
+        self.browser_activity = time.monotonic()
 
     def handle_content_ready(self, html_content):
         self.html_content = html_content
-        if self.loop.isRunning():
-            self.loop.quit()
+        self.content_event.set()
 
     def request_download(self, url, download_path, file_name):
+        self.downloaded_file_hash = ""
         try:
-            req = requests.get(url, headers=self.headers)
+            self.downloaded_file_path = self.cached_get(url, download_path, file_name)
+        except requests.HTTPError:
+            self.downloaded_file_path = ""
+            self.download_event.clear()
+            self.downloadFile.emit(url, download_path, file_name)
+            if not self.wait_for_browser(self.download_event):
+                return ""
+            if self.downloaded_file_path:
+                extension = os.path.splitext(self.downloaded_file_path)[1]
+                self.downloaded_file_hash = download_cache.store(url, self.downloaded_file_path, extension) or ""
         except Exception as e:
             print(f"Error requesting {url}: {str(e)}")
             return ""
-        
-        if req.status_code != 200:
-            self.loop = QEventLoop()
-            self.downloadFile.emit(url, download_path, file_name)
-            self.loop.exec()
-        else:
-            extension = os.path.splitext(urlparse(req.url).path)[1]
-            trainerTemp = os.path.join(download_path, file_name + extension)
-            with open(trainerTemp, "wb") as f:
-                f.write(req.content)
-            self.downloaded_file_path = trainerTemp
 
         return self.downloaded_file_path
 
+    def cached_get(self, url, download_path, file_name):
+        """
+        Download url into download_path through the local download cache, revalidating cached copies with the server.
+        Returns the saved file path, or "" if cancelled; raises requests.HTTPError on error status codes and
+        requests.RequestException if the server can't be reached without a usable cached copy.
+        """
+        cached = download_cache.lookup(url)
+        headers = dict(self.headers)
+        if cached:
+            headers.update(download_cache.validator_headers(cached))
+
+        request_error = None
+        try:
+            req = requests.get(url, headers=headers, stream=True)
+        except requests.RequestException as e:
+            if not cached:
+                raise
+            print(f"Error requesting {url}, using cached copy: {str(e)}")
+            req = None
+            request_error = e
+
+        if req is None or (cached and req.status_code == 304):
+            file_path = os.path.join(download_path, file_name + cached["extension"])
+            if download_cache.copy_blob(cached["hash"], file_path):
+                self.downloaded_file_hash = cached["hash"]
+                return file_path
+            if request_error:
+                # Unreachable and the cached copy is gone since the lookup: fail like an uncached request
+                raise request_error
+            # Evicted by another download since the lookup, fetch it afresh
+            req = requests.get(url, headers=self.headers, stream=True)
+
+        if req.status_code != 200:
+            raise requests.HTTPError(f"Status code {req.status_code}: {req.reason}", response=req)
+
+        extension = os.path.splitext(urlparse(req.url).path)[1]
+        file_path = os.path.join(download_path, file_name + extension)
+        file_hash = self.save_response(req, file_path)
+        if not file_hash:
+            return ""
+        download_cache.store(url, file_path, extension, req.headers, file_hash)
+        self.downloaded_file_hash = file_hash
+        return file_path
+
+    def save_response(self, req, file_path):
+        # Stream response body to disk, reporting progress; returns the sha256 of the body, or None if cancelled midway
+        total_size = int(req.headers.get("content-length", 0))
+        received_size = 0
+        sha256 = hashlib.sha256()
+        with open(file_path, "wb") as f:
+            for chunk in req.iter_content(chunk_size=65536):
+                if self.cancel_event.is_set():
+                    req.close()
+                    return None
+                f.write(chunk)
+                sha256.update(chunk)
+                received_size += len(chunk)
+                if total_size:
+                    self.progress.emit(int(received_size * 100 / total_size))
+        return sha256.hexdigest()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.browser_dialog.close()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
     def handle_download_completed(self, file_path):
         self.downloaded_file_path = file_path
-        if self.loop.isRunning():
-            self.loop.quit()
+        self.download_event.set()
 
     def is_internet_connected(self, urls=None, timeout=5):
         if urls is None:
@@ -538,40 +1440,20 @@ class DownloadBaseThread(QThread):
                 continue
         return False
     
-    def arabic_to_roman(self, num):
-        if num == 0:
-            return '0'
-
-        numeral_map = [
-            (1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'),
-            (100, 'C'), (90, 'XC'), (50, 'L'), (40, 'XL'),
-            (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')
-        ]
-        roman = ''
-
-        while num > 0:
-            for i, r in numeral_map:
-                while num >= i:
-                    roman += r
-                    num -= i
-
-        return roman
-    
-    def sanitize(self, text):
-        text = re.sub(r'\d+', lambda x: self.arabic_to_roman(int(x.group())), text)
-        return re.sub(r"[\-\s\"'‘’“”:：.。,，()（）<>《》;；!！?？@#$%^&™®_+*=~`|]", "", text).lower()
+    # Shared with the trainer catalog, which stores sanitized names
+    arabic_to_roman = staticmethod(arabic_to_roman)
+    sanitize = staticmethod(sanitize)
     
     def symbol_replacement(self, text):
         return text.replace(': ', ' - ').replace(':', '-').replace("/", "_").replace("?", "")
     
     def find_best_trainer_match(self, targetEnName, threshold=85):
-        trainer_details = self.load_json_content("xgqdetail.json")
-        if not trainer_details:
+        # Mapping of sanitized English names to their Chinese names, sanitized when the catalog was built
+        with trainer_catalog.snapshot() as catalog:
+            sanitized_to_original = catalog.keyw_by_en_key()
+        if not sanitized_to_original:
             return None
 
-        # Create a mapping of sanitized English names to their original dictionary
-        sanitized_to_original = {self.sanitize(trainer['en_name']): trainer['keyw'] for trainer in trainer_details}
-
         sanitized_target = self.sanitize(targetEnName)
         best_match, score = process.extractOne(sanitized_target, sanitized_to_original.keys())
 
@@ -655,23 +1537,11 @@ class DownloadBaseThread(QThread):
         return trans_trainerName
     
     def save_html_content(self, content, file_name):
-        html_file = os.path.join(DATABASE_PATH, file_name)
-        with open(html_file, 'w', encoding='utf-8') as file:
-            file.write(content)
+        # Published as a new snapshot version, searches reading the previous one are unaffected
+        snapshot_store.write_text(file_name, content)
     
     def load_html_content(self, file_name):
-        html_file = os.path.join(DATABASE_PATH, file_name)
-        if os.path.exists(html_file):
-            with open(html_file, 'r', encoding='utf-8') as file:
-                return file.read()
-        return ""
-    
-    def load_json_content(self, file_name):
-        json_file = os.path.join(DATABASE_PATH, file_name)
-        if os.path.exists(json_file):
-            with open(json_file, 'r', encoding='utf-8') as file:
-                return json.load(file)
-        return ""
+        return snapshot_store.read_text(file_name)
 
         
 class UpdateTrainers(DownloadBaseThread):
@@ -680,6 +1550,22 @@ class UpdateTrainers(DownloadBaseThread):
     updateTrainer = pyqtSignal(str, str)
     finished = pyqtSignal(str)
 
+    # "FLiNGTrainerNamedPipe_" as UTF-16 (current trainers) or ASCII (older builds), matched in a single pass
+    build_marker_pattern = re.compile(rb'F\x00L\x00i\x00N\x00G\x00T\x00r\x00a\x00i\x00n\x00e\x00r\x00N\x00a\x00m\x00e\x00d\x00P\x00i\x00p\x00e\x00_|FLiNGTrainerNamedPipe_')
+    build_date_pattern = re.compile(rb'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{1,2})\s+(\d{4})\b')
+    build_date_months = [b"Jan", b"Feb", b"Mar", b"Apr", b"May", b"Jun", b"Jul", b"Aug", b"Sep", b"Oct", b"Nov", b"Dec"]
+
+    tag_page_ttl = 1800  # shorter than the hourly check interval, so every cycle sees fresh pages
+    tag_page_cache = {}  # {tag name: (fetched at, parsed tag page)}
+    tag_page_flights = {}  # {tag name: Future of the fetch in progress}
+    tag_page_lock = threading.Lock()
+    catalog_feed_pages = 2
+
+    # Seconds until a trainer's next remote check, by how many days ago its game was last updated upstream
+    check_intervals = [(30, 6 * 3600), (180, 24 * 3600)]
+    stale_check_interval = 7 * 24 * 3600
+    check_budget = 25  # remote checks per cycle, the most overdue trainers go first
+
     def __init__(self, trainers, parent=None):
         super().__init__(parent)
         self.trainers = trainers
@@ -688,12 +1574,18 @@ class UpdateTrainers(DownloadBaseThread):
         statusWidgetName = "trainerUpdate"
         self.message.emit(statusWidgetName, tr("Checking for trainer updates"))
 
-        if os.path.exists(VERSION_TEMP_DIR):
-            shutil.rmtree(VERSION_TEMP_DIR)
-
         if self.is_internet_connected():
+            self.refresh_catalog()
+            trainerPaths = {os.path.normcase(trainerPath): trainerPath for trainerPath in self.trainers.values()}
             with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [executor.submit(self.process_trainer, trainerPath) for trainerPath in self.trainers.values()]
+                # Analyze local files first so the catalog join sees current metadata
+                list(executor.map(self.analyze_trainer, trainerPaths.values()))
+
+                # Catalog matches resolve without requests; of the rest only the most overdue get a tag page check
+                catalog = {path: match for path, match in library_index.catalog_matches().items() if path in trainerPaths}
+                due = library_index.due_for_check(trainerPaths.keys() - catalog.keys(), self.check_budget)
+                futures = [executor.submit(self.process_trainer, trainerPaths[path], match) for path, match in catalog.items()]
+                futures += [executor.submit(self.process_trainer, trainerPaths[path]) for path in due]
 
                 for future in concurrent.futures.as_completed(futures):
                     result = future.result()
@@ -706,85 +1598,293 @@ class UpdateTrainers(DownloadBaseThread):
         
         self.finished.emit(statusWidgetName)
 
-    def process_trainer(self, trainerPath):
-        # The binary pattern representing "FLiNGTrainerNamedPipe_" followed by some null bytes and the date
-        pattern_hex = '46 00 4c 00 69 00 4E 00 47 00 54 00 72 00 61 00 69 00 6E 00 65 00 72 00 4E 00 61 00 6D 00 65 00 64 00 50 00 69 00 70 00 65 00 5F'
-        pattern = bytes.fromhex(''.join(pattern_hex.split()))
-        tagName = self.get_product_name(trainerPath)
-
-        if os.path.exists(trainerPath):
-            with open(trainerPath, 'rb') as file:
-                content = file.read()
-                pattern_index = content.find(pattern)
-                if pattern_index != -1:
-                    start_index = pattern_index + len(pattern)
-                    while content[start_index] == 0:
-                        start_index += 1
-
-                    # The date could be "Mar  8 2024" or "Dec 10 2022"
-                    date_match = re.search(rb'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{4}\b', content[start_index:])
-                    if date_match and tagName:
-                        locale.setlocale(locale.LC_TIME, 'English_United States')
-                        trainerSrcDate = datetime.datetime.strptime(date_match.group().decode('utf-8'), '%b %d %Y')
-
-                        page_content = self.get_webpage_content(f"https://flingtrainer.com/tag/{tagName}", "FLiNG Trainer")
-                        tagPage = BeautifulSoup(page_content, 'html.parser')
-
-                        trainerNamesMap = {}  # trainerName: gameContentEntryOnWeb
-                        for game in tagPage.find_all('div', class_='post-content'):
-                            trainerName = self.sanitize(game.find('a', rel='bookmark').text)
-                            trainerNamesMap[trainerName] = game
-
-                        if trainerNamesMap:
-                            best_match, score = process.extractOne(self.sanitize(tagName + "-trainer"), trainerNamesMap.keys())
-                            if score >= 85:
-                                targetGameOgj = trainerNamesMap[best_match]
-                                version_entry = targetGameOgj.find('div', class_='entry')
-                                
-                                if version_entry:
-                                    match = re.search(r'Last Updated:\s+(\d+\.\d+\.\d+)', version_entry.text)
-                                    if match:
-                                        trainerDstDate = datetime.datetime.strptime(match.group(1), '%Y.%m.%d')
-                                        print(f"{tagName}\nTrainer source date: {trainerSrcDate.strftime('%Y-%m-%d')}\nNewest build date: {trainerDstDate.strftime('%Y-%m-%d')}\n")
-                                        
-                                        if trainerDstDate > trainerSrcDate:
-                                            update_url = targetGameOgj.find('a', href=True, rel='bookmark')['href']
-                                            return trainerPath, update_url
+    def process_trainer(self, trainerPath, catalog_match=None):
+        if catalog_match:
+            # Resolved from the update catalog, no request needed
+            build_date, last_updated, trainer_url = catalog_match
+            next_check = self.next_check(datetime.datetime.strptime(last_updated, '%Y-%m-%d'))
+            if last_updated > build_date:
+                library_index.record_check(trainerPath, "outdated", next_check, trainer_url, last_updated)
+                return trainerPath, trainer_url
+            library_index.record_check(trainerPath, "current", next_check, trainer_url, last_updated)
+            return None
+
+        tagName, trainerSrcDate = self.analyze_trainer(trainerPath)
+        if not tagName or not trainerSrcDate:
+            # Nothing to look up until the file changes, which makes it due again
+            library_index.record_check(trainerPath, "untagged", self.next_check(None))
+            return None
+
+        tagEntries = self.get_tag_page(tagName)
+        if tagEntries is None:
+            return None  # fetch failed, keep the previous check result
+        if tagEntries:
+            best_match, score = process.extractOne(self.sanitize(tagName + "-trainer"), tagEntries.keys())
+            if score >= 85:
+                trainerDstDate, trainer_url = tagEntries[best_match]
+                if trainerDstDate:
+                    print(f"{tagName}\nTrainer source date: {trainerSrcDate.strftime('%Y-%m-%d')}\nNewest build date: {trainerDstDate.strftime('%Y-%m-%d')}\n")
+
+                    next_check = self.next_check(trainerDstDate)
+                    last_updated = trainerDstDate.strftime('%Y-%m-%d')
+                    if trainerDstDate > trainerSrcDate:
+                        library_index.record_check(trainerPath, "outdated", next_check, trainer_url, last_updated)
+                        return trainerPath, trainer_url
+                    library_index.record_check(trainerPath, "current", next_check, trainer_url, last_updated)
+                    return None
+
+        library_index.record_check(trainerPath, "unmatched", self.next_check(None))
         return None
-    
-    def get_product_name(self, trainerPath):
-        os.makedirs(VERSION_TEMP_DIR, exist_ok=True)
-        unique_id = uuid.uuid4().hex
-        temp_version_info = os.path.join(VERSION_TEMP_DIR, f"version_info_{unique_id}.rc")
-
-        # Command to extract version information using Resource Hacker
-        command = [resourceHacker_path, "-open", trainerPath, "-save",
-                   temp_version_info, "-action", "extract", "-mask", "VERSIONINFO,,"]
-        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW)
-
-        file_content = None
-        for _ in range(10):
-            if os.path.exists(temp_version_info):
-                with open(temp_version_info, 'r', encoding='utf-16') as file:
-                    file_content = file.read()
-                    break
-            time.sleep(0.2)
-        if not file_content:
-            print("\nCould not find extracted .rc file for version info")
+
+    def next_check(self, last_updated):
+        # Actively updated games are checked every few hours, long finished ones weekly
+        interval = self.stale_check_interval
+        if last_updated:
+            age = (datetime.datetime.now() - last_updated).days
+            interval = next((seconds for days, seconds in self.check_intervals if age <= days), interval)
+        return time.time() + interval
+
+    def get_tag_page(self, tagName):
+        """
+        Return {sanitized trainer name: (last updated date, trainer url)} for a FLiNG tag page, None if it couldn't be fetched.
+        Trainers sharing a tag wait on a single in-flight fetch, and parsed pages are reused for tag_page_ttl seconds.
+        """
+        with self.tag_page_lock:
+            cached = self.tag_page_cache.get(tagName)
+            if cached and time.time() - cached[0] < self.tag_page_ttl:
+                return cached[1]
+            flight = self.tag_page_flights.get(tagName)
+            is_leader = flight is None
+            if is_leader:
+                flight = concurrent.futures.Future()
+                self.tag_page_flights[tagName] = flight
+
+        if not is_leader:
+            return flight.result()
+
+        tagEntries = None
+        try:
+            tagEntries = self.fetch_tag_page(tagName)
+        except Exception as e:
+            print(f"Error fetching tag page {tagName}: {str(e)}")
+        finally:
+            with self.tag_page_lock:
+                # Failed fetches are not cached so the next cycle retries them
+                if tagEntries is not None:
+                    self.tag_page_cache[tagName] = (time.time(), tagEntries)
+                del self.tag_page_flights[tagName]
+            flight.set_result(tagEntries)
+
+        return tagEntries
+
+    def fetch_tag_page(self, tagName):
+        page_content = self.get_webpage_content(f"https://flingtrainer.com/tag/{tagName}", "FLiNG Trainer")
+        if not page_content:
             return None
 
-        product_name = None
-        tag_name = None
-        match = re.search(r'VALUE "ProductName", "(.*?)"', file_content)
-        os.remove(temp_version_info)
-        if match:
-            product_name = match.group(1)
+        tagEntries = self.parse_listing(page_content)
+        library_index.record_catalog(self.catalog_entries(tagEntries))
+        return tagEntries
+
+    def refresh_catalog(self):
+        """
+        Pull the front page listing (newest updates first) into the update catalog, going on to the next page
+        only while the previous refresh isn't reached yet. Usually costs one request for the whole library.
+        """
+        last_feed = library_index.get_state("last_feed")
+        entries, feed_oldest = [], None
+        for page in range(1, self.catalog_feed_pages + 1):
+            url = "https://flingtrainer.com/" if page == 1 else f"https://flingtrainer.com/page/{page}/"
+            page_content = self.get_webpage_content(url, "FLiNG Trainer")
+            if not page_content:
+                break
+
+            page_entries = self.catalog_entries(self.parse_listing(page_content))
+            if not page_entries:
+                break
+            entries.extend(page_entries)
+            feed_oldest = min(last_updated for _, _, last_updated in entries)
+            if last_feed and feed_oldest <= last_feed:
+                break
+
+        if entries:
+            library_index.record_catalog(entries, feed_oldest)
+
+    def catalog_entries(self, listing):
+        return [(trainer_url, trainerName, trainerDstDate.strftime('%Y-%m-%d'))
+                for trainerName, (trainerDstDate, trainer_url) in listing.items() if trainerDstDate]
+
+    def parse_listing(self, page_content):
+        # {sanitized trainer name: (last updated date, trainer url)} of a FLiNG post listing (tag page or front page)
+        listing = {}
+        listingPage = BeautifulSoup(page_content, 'html.parser')
+        for game in listingPage.find_all('div', class_='post-content'):
+            link = game.find('a', href=True, rel='bookmark')
+            if not link:
+                continue
+
+            trainerDstDate = None
+            version_entry = game.find('div', class_='entry')
+            if version_entry:
+                match = re.search(r'Last Updated:\s+(\d+\.\d+\.\d+)', version_entry.text)
+                if match:
+                    trainerDstDate = datetime.datetime.strptime(match.group(1), '%Y.%m.%d')
+            listing[self.sanitize(link.text)] = (trainerDstDate, link['href'])
+
+        return listing
+
+    @classmethod
+    def analyze_trainer(cls, trainerPath):
+        """
+        Return (tag name, build date) of a trainer, reading the binary only when it changed since the last analysis.
+        """
+        try:
+            file_stat = os.stat(trainerPath)
+        except OSError:
+            return None, None
+
+        metadata = library_index.get_metadata(trainerPath, file_stat)
+        if metadata is not None:
+            build_date = metadata["build_date"] and datetime.datetime.strptime(metadata["build_date"], '%Y-%m-%d')
+            return metadata["tag_name"], build_date
+
+        tagName, edition = cls.get_product_name(trainerPath)
+        trainerSrcDate = cls.read_build_date(trainerPath) if tagName else None
+        library_index.set_metadata(trainerPath, file_stat, tagName, edition, trainerSrcDate and trainerSrcDate.strftime('%Y-%m-%d'),
+                                   download_cache.hash_file(trainerPath))
+        return tagName, trainerSrcDate
+
+    @classmethod
+    def read_build_date(cls, trainerPath):
+        """
+        Find the build date FLiNG stores after its named pipe marker, e.g. "Mar  8 2024" or "Dec 10 2022".
+        Scans the memory-mapped file without copying, limited to the section that holds the marker.
+        """
+        if not os.path.exists(trainerPath) or os.path.getsize(trainerPath) == 0:
+            return None
+
+        with open(trainerPath, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                marker = cls.build_marker_pattern.search(content)
+                if not marker:
+                    return None
+
+                try:
+                    section_start, section_end = PEFile(content).section_bounds(marker.start())
+                except Exception:
+                    section_end = len(content)
+                date_match = cls.build_date_pattern.search(content, marker.end(), section_end)
+                if not date_match:
+                    return None
+                month, day, year = date_match.groups()
+
+        return datetime.datetime(int(year), cls.build_date_months.index(month) + 1, int(day))
+
+    @staticmethod
+    def get_product_name(trainerPath):
+        """
+        Return (tag name, edition) parsed from the trainer's ProductName, e.g. ("elden-ring", "v1.02") for
+        "Elden Ring v1.02-v1.10 Plus 40 Trainer". The edition is the first game version the trainer supports, which
+        tells trainers kept side by side for different game versions apart from newer builds of the same trainer.
+        """
+        try:
+            version_strings = read_version_strings(trainerPath)
+        except Exception as e:
+            print(f"\nCould not read version info of {trainerPath}: {str(e)}")
+            return None, None
+
+        tag_name = edition = None
+        product_name = version_strings.get("ProductName")
+        if product_name:
             # Parse only the game name
-            match = re.search(r'^(.*?)(\s+v\d+|\s+Early Access)', product_name)
+            match = re.search(r'^(.*?)\s+(v\d[\d.]*|Early Access)', product_name)
             if match:
                 tag_name = match.group(1).lower().replace("(", "").replace(")", "").replace(" ", "-")
+                edition = match.group(2).lower()
+
+        return tag_name, edition
 
-        return tag_name
+
+class DuplicateTrainersThread(QThread):
+    """
+    Finds trainers that only take up space: identical copies (same content hash) and builds superseded by a newer
+    build of the same product and edition. Hashes, tag names and build dates come from the library index, so unchanged
+    trainers aren't read again on later runs.
+    """
+    message = pyqtSignal(str, str)
+    finished = pyqtSignal(str)
+    result = pyqtSignal(list)
+
+    def __init__(self, trainers, parent=None):
+        super().__init__(parent)
+        self.trainerPaths = list(trainers.values())
+
+    def run(self):
+        statusWidgetName = "duplicates"
+        self.message.emit(statusWidgetName, tr("Looking for duplicate trainers"))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            infos = [info for info in executor.map(self.trainer_info, self.trainerPaths) if info]
+        self.result.emit(self.find_groups(infos))
+
+        self.finished.emit(statusWidgetName)
+
+    def trainer_info(self, trainerPath):
+        try:
+            UpdateTrainers.analyze_trainer(trainerPath)
+            file_stat = os.stat(trainerPath)
+            metadata = library_index.get_metadata(trainerPath, file_stat)
+            if metadata is None:
+                return None
+            if not metadata["content_hash"]:
+                # Analyzed before hashes were indexed
+                metadata["content_hash"] = download_cache.hash_file(trainerPath)
+                library_index.record_hash(trainerPath, file_stat, metadata["content_hash"])
+            if metadata["tag_name"] and not metadata["edition"]:
+                # Analyzed before editions were indexed
+                metadata["edition"] = UpdateTrainers.get_product_name(trainerPath)[1]
+                library_index.record_edition(trainerPath, file_stat, metadata["edition"])
+        except Exception as e:
+            print(f"Error analyzing {trainerPath}: {str(e)}")
+            return None
+
+        return {
+            "path": trainerPath,
+            "size": file_stat.st_size,
+            "hash": metadata["content_hash"],
+            "tag": metadata["tag_name"],
+            "edition": metadata["edition"],
+            "build_date": metadata["build_date"],
+            "installed_at": metadata["installed_at"] or file_stat.st_mtime,
+        }
+
+    def find_groups(self, infos):
+        # [(kind, kept trainer, [removable trainers])]; kind is "duplicate" or "superseded"
+        groups = []
+
+        # Identical content: keep the copy installed first
+        byHash = {}
+        for info in infos:
+            byHash.setdefault(info["hash"], []).append(info)
+        unique = []
+        for copies in byHash.values():
+            copies.sort(key=lambda info: (info["installed_at"], len(info["path"])))
+            unique.append(copies[0])
+            if len(copies) > 1:
+                groups.append(("duplicate", copies[0], copies[1:]))
+
+        # Same product and edition: keep the newest build. Editions for other game versions are kept side by side
+        byProduct = {}
+        for info in unique:
+            if info["tag"] and info["edition"] and info["build_date"]:
+                byProduct.setdefault((info["tag"], info["edition"]), []).append(info)
+        for builds in byProduct.values():
+            builds.sort(key=lambda info: info["build_date"], reverse=True)
+            older = [info for info in builds[1:] if info["build_date"] < builds[0]["build_date"]]
+            if older:
+                groups.append(("superseded", builds[0], older))
+
+        return groups
 
 
 class FetchFlingSite(DownloadBaseThread):
@@ -852,32 +1952,33 @@ class FetchTrainerDetails(DownloadBaseThread):
 
         if total_pages:
             completed_pages = 0
-            error = False
             self.update.emit(statusWidgetName, f"{fetch_message} ({completed_pages}/{total_pages})", "load")
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [executor.submit(self.fetch_page, page) for page in range(1, total_pages + 1)]
-                all_data = []
-                for future in concurrent.futures.as_completed(futures):
-                    result = future.result()
-                    if result:
-                        all_data.extend(result)
-                    else:
-                        error = True
-                    completed_pages += 1
-                    self.update.emit(statusWidgetName, f"{fetch_message} ({completed_pages}/{total_pages})", "load")
-
-            if error:
+            # Pages go into the new catalog as they arrive and are dropped right after, so memory stays flat as the
+            # database grows; the catalog is only published once every page made it in
+            try:
+                with trainer_catalog.build() as catalog:
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+                        futures = {executor.submit(self.fetch_page, page): page for page in range(1, total_pages + 1)}
+                        for future in concurrent.futures.as_completed(futures):
+                            page = futures.pop(future)
+                            result = future.result()
+                            if result is None:
+                                for pending in futures:
+                                    pending.cancel()
+                                raise ValueError(f"missing trainer detail page {page}")
+                            catalog.add_page(result, page)
+                            completed_pages += 1
+                            self.update.emit(statusWidgetName, f"{fetch_message} ({completed_pages}/{total_pages})", "load")
+
+                    catalog.add_overlay(db_additions.additions)
+                print(f"Trainer details without a download url: {len(catalog.failures)}\n")
+            except Exception as e:
+                print(f"Error building trainer catalog: {str(e)}")
                 self.update.emit(statusWidgetName, fetch_error, "error")
                 time.sleep(2)
                 self.finished.emit(statusWidgetName)
                 return
-            
-            all_data.extend(db_additions.additions)
-
-            filepath = os.path.join(DATABASE_PATH, "xgqdetail.json")
-            with open(filepath, 'w', encoding='utf-8') as file:
-                json.dump(all_data, file, ensure_ascii=False, indent=4)
 
         else:
             self.update.emit(statusWidgetName, fetch_error, "error")
@@ -1005,11 +2106,11 @@ class DownloadDisplayThread(DownloadBaseThread):
             self.message.emit(tr("Translating keywords..."), None)
 
             # Using 3dm api to match cn_names
-            trainer_details = self.load_json_content("xgqdetail.json")
-            if trainer_details:
-                for trainer in trainer_details:
-                    if keyword in trainer.get("keyw", ""):
-                        translations.append(trainer.get("en_name", ""))
+            with trainer_catalog.snapshot() as catalog:
+                catalogTranslations = catalog.en_names_for_keyword(keyword) if catalog.has_entries() else None
+
+            if catalogTranslations is not None:
+                translations.extend(catalogTranslations)
 
             elif self.initialize_translator():
                 # Direct translation
@@ -1089,43 +2190,13 @@ class DownloadDisplayThread(DownloadBaseThread):
         return True
     
     def search_from_xgqdetail(self, keyword):
-        trainer_details = self.load_json_content("xgqdetail.json")
-        if trainer_details:
-            for entry in trainer_details:
-                if "id" in entry and (keyword in entry["keyw"] or (len(keyword) >= 2 and keyword.lower() in entry["en_name"].lower())):
-                    full_url = ""
-                    anti_url = ""
-                    if settings["language"] == "en_US" or settings["enSearchResults"]:
-                        trainerDisplayName = f"{entry['en_name']} Trainer"
-                    elif settings["language"] == "zh_CN" or settings["language"] == "zh_TW":
-                        pattern = r'\s(v[\d\.v\-]+.*|Early ?Access.*)'
-                        trainerDisplayName = f"《{re.sub(pattern, '', entry['title'])}》修改器"
+        # Display names and download urls were derived when the catalog was built
+        chineseNames = not settings["enSearchResults"] and settings["language"] in ("zh_CN", "zh_TW")
+        with trainer_catalog.snapshot() as catalog:
+            results = catalog.search(keyword, chineseNames)
+        for trainerDisplayName, full_url, anti_url in results:
+            DownloadBaseThread.trainer_urls[trainerDisplayName] = [full_url, anti_url]
 
-                    try:
-                        # Construct download url, example: https://down.fucnm.com/Story.of.Seasons.A.Wonderful.Life.v1.0.Plus.24.Trainer-FLiNG.zip
-                        base_url = "https://down.fucnm.com/"
-                        trainer_name = entry["en_name"].replace(": ", ".").replace("：", ".").replace(",", "").replace("'", "").replace("’", "").replace("?", "").replace("/", ".").replace(" - ", ".").replace(" ", ".")
-                        version = entry["version"]
-                        if self.sanitize(version) == "earlyaccess":
-                            version = "Early.Access"
-
-                        countMatch = re.search(r"(\w+?)项", entry["keyv"])
-                        if countMatch:
-                            chinese_count = countMatch.group(1)
-                            count = cn2an.cn2an(chinese_count, "smart")
-                        count = f"Plus.{count}"
-
-                        full_url = f"{base_url}{trainer_name}.{version}.{count}.Trainer-FLiNG.zip"
-
-                        if "anti_url" in entry:
-                            anti_url = entry["anti_url"]
-                    except Exception as e:
-                        self.message.emit(tr("Failed to get trainer url: ") + trainerDisplayName, "failure")
-                        print(f"Constructing download url for {entry['keyw']} failed: {str(e)}")
-                    
-                    if trainerDisplayName and full_url:
-                        DownloadBaseThread.trainer_urls[trainerDisplayName] = [full_url, anti_url]
-        
         self.message.emit(tr("Search success!"), "success")
         time.sleep(0.5)
         return True
@@ -1144,27 +2215,32 @@ class DownloadDisplayThread(DownloadBaseThread):
 
 
 class DownloadTrainersThread(DownloadBaseThread):
-    def __init__(self, index, trainers, trainerDownloadPath, update, trainerPath, updateUrl, parent=None):
+    fling_settings_lock = threading.Lock()
+
+    def __init__(self, trainerEntry, trainers, trainerDownloadPath, update, trainerPath, updateUrl, parent=None):
         super().__init__(parent)
-        self.index = index
+        self.trainerEntry = trainerEntry  # (trainer name, download url(s)) captured from search results when queued
         self.trainers = trainers
         self.trainerDownloadPath = trainerDownloadPath
         self.update = update
         self.trainerPath = trainerPath
         self.updateUrl = updateUrl
-        self.download_finish_delay = 0.5
-        self.update_error_delay = 3
+        self.workspace = None
 
     def run(self):
+        self.workspace = DownloadWorkspace()
+        try:
+            self.download()
+        finally:
+            self.workspace.cleanup()
+
+    def download(self):
         self.message.emit(tr("Checking for internet connection..."), None)
         if not self.is_internet_connected():
             self.message.emit(tr("No internet connection, download failed."), "failure")
-            time.sleep(self.download_finish_delay)
             self.finished.emit(1)
             return
 
-        if os.path.exists(DOWNLOAD_TEMP_DIR):
-            shutil.rmtree(DOWNLOAD_TEMP_DIR)
         antiUrl = ""
         
         if self.update:
@@ -1174,8 +2250,7 @@ class DownloadTrainersThread(DownloadBaseThread):
         if self.update or settings["downloadServer"] == "intl":
             # Trainer name check
             if not self.update:
-                trainer_list = list(DownloadBaseThread.trainer_urls.items())
-                filename = trainer_list[self.index][0]
+                filename = self.trainerEntry[0]
                 trainerName_download = self.symbol_replacement(filename)
                 self.message.emit(tr("Translating trainer name..."), None)
                 trainerName_final = self.symbol_replacement(self.translate_trainer(trainerName_download))
@@ -1183,7 +2258,6 @@ class DownloadTrainersThread(DownloadBaseThread):
                 for trainerPath in self.trainers.keys():
                     if trainerName_download in trainerPath or trainerName_final in trainerPath:
                         self.message.emit(tr("Trainer already exists, aborted download."), "failure")
-                        time.sleep(self.download_finish_delay)
                         self.finished.emit(1)
                         return
             else:
@@ -1195,7 +2269,7 @@ class DownloadTrainersThread(DownloadBaseThread):
             try:
                 # Additional trainer file extraction for trainers from main site
                 if not self.update:
-                    targetUrl = DownloadBaseThread.trainer_urls[filename]
+                    targetUrl = self.trainerEntry[1]
                 else:
                     targetUrl = self.updateUrl
 
@@ -1205,44 +2279,42 @@ class DownloadTrainersThread(DownloadBaseThread):
                     trainerPage = BeautifulSoup(page_content, 'html.parser')
                     targetUrl = trainerPage.find(target="_self").get("href")
                 
-                os.makedirs(DOWNLOAD_TEMP_DIR, exist_ok=True)
-                trainerTemp = self.request_download(targetUrl, DOWNLOAD_TEMP_DIR, trainerName_download)
+                trainerTemp = self.request_download(targetUrl, self.workspace.archive_dir, trainerName_download)
 
             except Exception as e:
                 self.message.emit(tr("An error occurred while downloading trainer: ") + str(e), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
+
+            if self.is_cancelled():
+                self.finish_cancelled()
+                return
             
-            # Ensure file is successfully downloaded
-            found_trainer = False
-            for i in range(30):
-                if os.path.exists(trainerTemp):
-                    found_trainer = True
-                    break
-                time.sleep(1)
-            if not found_trainer:
+            # request_download only returns once the download has completed or failed
+            if not trainerTemp or not os.path.exists(trainerTemp):
                 self.message.emit(tr("Downloaded file not found."), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
 
-            # Extract compressed file and rename
+            # Extract trainer executables, everything else only if the user has to look at it
+            def select_trainers(entries):
+                if any("trainer" not in entry.lower() for entry in entries) and not self.update:
+                    return None
+                return [entry for entry in entries if "trainer" in entry.lower() and entry.endswith(".exe")]
+
             self.message.emit(tr("Decompressing..."), None)
             try:
-                command = [unzip_path, "x", "-y", trainerTemp, f"-o{DOWNLOAD_TEMP_DIR}"]
-                subprocess.run(command, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+                entries = self.extract_archive(trainerTemp, self.workspace.extract_dir, select_trainers, self.downloaded_file_hash)
 
             except Exception as e:
                 self.message.emit(tr("An error occurred while extracting downloaded trainer: ") + str(e), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
 
             # Locate extracted .exe file
             cnt = 0
             exeRawName = []
-            for filename in os.listdir(DOWNLOAD_TEMP_DIR):
+            for filename in entries:
                 if "trainer" in filename.lower() and filename.endswith(".exe"):
                     exeRawName.append(filename)
                 elif "trainer" not in filename.lower():
@@ -1251,12 +2323,12 @@ class DownloadTrainersThread(DownloadBaseThread):
             # Warn user if anti-cheat files found
             if cnt > 0 and not self.update:
                 self.messageBox.emit("info", tr("Attention"), tr("Please check folder for anti-cheat requirements!"))
-                os.startfile(DOWNLOAD_TEMP_DIR)
+                self.workspace.keep(self.workspace.extract_dir)
+                os.startfile(self.workspace.extract_dir)
 
             # Check if exeRawName is None
             if not exeRawName:
                 self.message.emit(tr("Could not find the downloaded trainer file, please try turning your antivirus software off."), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
 
@@ -1284,108 +2356,90 @@ class DownloadTrainersThread(DownloadBaseThread):
 
                     trainer_name = f"{trainerName_final}{trainer_details}"
                 
-                    source_file = os.path.join(DOWNLOAD_TEMP_DIR, source_exe)
+                    source_file = self.workspace.extract_path(source_exe)
                     destination_file = os.path.join(self.trainerDownloadPath, trainer_name)
                     src_dst[source_file] = destination_file
 
             else:
                 trainer_name = f"{trainerName_final}.exe"
-                source_file = os.path.join(DOWNLOAD_TEMP_DIR, exeRawName[0])
+                source_file = self.workspace.extract_path(exeRawName[0])
                 destination_file = os.path.join(self.trainerDownloadPath, trainer_name)
                 src_dst[source_file] = destination_file
 
         elif settings["downloadServer"] == "china":
-            trainer_list = list(DownloadBaseThread.trainer_urls.items())
-            trainerName = self.symbol_replacement(trainer_list[self.index][0])
-            downloadUrl = trainer_list[self.index][1][0]
-            antiUrl = trainer_list[self.index][1][1]
-            if os.path.splitext(urlparse(antiUrl).path)[1] == ".rar":
-                antiUrl = ""
+            trainerName = self.symbol_replacement(self.trainerEntry[0])
+            downloadUrl = self.trainerEntry[1][0]
+            antiUrl = self.trainerEntry[1][1]
 
             for trainerPath in self.trainers.keys():
                 if trainerName in trainerPath:
                     self.message.emit(tr("Trainer already exists, aborted download."), "failure")
-                    time.sleep(self.download_finish_delay)
                     self.finished.emit(1)
                     return
             
-            # Download trainer
+            # Download trainer and anti-cheat files
             self.message.emit(tr("Downloading..."), None)
+            antiTemp = ""
             try:
-                req = requests.get(downloadUrl, headers=self.headers)
-                if req.status_code != 200:
-                    self.message.emit(tr("An error occurred while downloading trainer: ") + f"Status code {req.status_code}: {req.reason}", "failure")
-                    time.sleep(self.download_finish_delay)
-                    self.finished.emit(1)
-                    return
+                trainerTemp = self.cached_get(downloadUrl, self.workspace.archive_dir, trainerName)
+                trainerHash = self.downloaded_file_hash
+                if antiUrl and trainerTemp:
+                    antiFileName = os.path.splitext(os.path.basename(urlparse(antiUrl).path))[0]
+                    antiTemp = self.cached_get(antiUrl, self.workspace.archive_dir, antiFileName)
             except Exception as e:
                 print(f"Error requesting {downloadUrl}: {str(e)}")
+                self.message.emit(tr("An error occurred while downloading trainer: ") + str(e), "failure")
+                self.finished.emit(1)
                 return
-            
-            os.makedirs(DOWNLOAD_TEMP_DIR, exist_ok=True)
-            trainerTemp = os.path.join(DOWNLOAD_TEMP_DIR, trainerName + ".zip")
-            with open(trainerTemp, "wb") as f:
-                f.write(req.content)
 
-            # Download anti-cheat files
-            anti_folder = os.path.join(DOWNLOAD_TEMP_DIR, "anti")
-            if antiUrl:
-                try:
-                    req = requests.get(antiUrl, headers=self.headers)
-                    if req.status_code != 200:
-                        self.message.emit(tr("An error occurred while downloading trainer: ") + f"Status code {req.status_code}: {req.reason}", "failure")
-                        time.sleep(self.download_finish_delay)
-                        self.finished.emit(1)
-                        return
-                except Exception as e:
-                    print(f"Error requesting {antiUrl}: {str(e)}")
-                    return
+            if not trainerTemp or (antiUrl and not antiTemp):
+                self.finish_cancelled()
+                return
 
+            anti_folder = os.path.join(self.workspace.root, "anti")
+            if antiUrl:
                 os.makedirs(anti_folder, exist_ok=True)
-                antiFileName = os.path.basename(urlparse(antiUrl).path)
-                antiTemp = os.path.join(anti_folder, antiFileName)
-                with open(antiTemp, "wb") as f:
-                    f.write(req.content)
             
             # Decompress downloaded zip
             self.message.emit(tr("Decompressing..."), None)
             try:
-                command = [unzip_path, "x", "-y", trainerTemp, f"-o{DOWNLOAD_TEMP_DIR}"]
-                subprocess.run(command, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+                entries = self.extract_archive(trainerTemp, self.workspace.extract_dir, lambda entries: [entry for entry in entries if entry.endswith(".exe")], trainerHash)
                 if antiUrl:
-                    command = [unzip_path, "x", "-y", antiTemp, f"-o{anti_folder}"]
-                    subprocess.run(command, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+                    self.extract_archive(antiTemp, anti_folder, lambda entries: None)
 
             except Exception as e:
                 self.message.emit(tr("An error occurred while extracting downloaded trainer: ") + str(e), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
 
             # Locate extracted .exe file
             cnt = 0
             exeRawName = None
-            for filename in os.listdir(DOWNLOAD_TEMP_DIR):
+            for filename in entries:
                 if filename.endswith(".exe"):
                     exeRawName = filename
 
             # Warn user if anti-cheat files found
             if antiUrl:
                 self.messageBox.emit("info", tr("Attention"), tr("Please check folder for anti-cheat requirements!"))
+                self.workspace.keep(anti_folder)
                 os.startfile(anti_folder)
             
             if not exeRawName:
                 self.message.emit(tr("Could not find the downloaded trainer file, please try turning your antivirus software off."), "failure")
-                time.sleep(self.download_finish_delay)
                 self.finished.emit(1)
                 return
 
             os.makedirs(self.trainerDownloadPath, exist_ok=True)
             src_dst = {}
-            source_file = os.path.join(DOWNLOAD_TEMP_DIR, exeRawName)
+            source_file = self.workspace.extract_path(exeRawName)
             destination_file = os.path.join(self.trainerDownloadPath, trainerName + ".exe")
             src_dst[source_file] = destination_file
 
+        if self.is_cancelled():
+            self.finish_cancelled()
+            return
+
         # remove fling trainer bg music
         if settings["removeBgMusic"]:
             self.message.emit(tr("Removing trainer background music..."), None)
@@ -1408,29 +2462,82 @@ class DownloadTrainersThread(DownloadBaseThread):
                     os.chmod(dst, stat.S_IWRITE)
                 shutil.move(src, dst)
 
-            os.remove(trainerTemp)
-            if antiUrl:
-                os.remove(antiTemp)
-            rhLog = os.path.join(DOWNLOAD_TEMP_DIR, "rh.log")
-            if os.path.exists(rhLog):
-                os.remove(rhLog)
-
         except PermissionError as e:
             self.message.emit(tr("Trainer is currently in use, please close any programs using the file and try again."), "failure")
-            time.sleep(self.update_error_delay)
             self.finished.emit(1)
             return
         except Exception as e:
             self.message.emit(tr("Could not find the downloaded trainer file, please try turning your antivirus software off."), "failure")
-            time.sleep(self.download_finish_delay)
             self.finished.emit(1)
             return
         
         self.message.emit(tr("Download success!"), "success")
-        time.sleep(self.download_finish_delay)
         self.finished.emit(0)
+
+    def extract_archive(self, archivePath, destination, select_members, archive_hash=""):
+        """
+        Extract archivePath into destination and return its top level entry names.
+        select_members receives those names and returns the top level files to write, or None for everything.
+        Zip archives are streamed in-process; other formats go through the bundled 7z, which extracts everything.
+        Selected members of a known archive_hash are served from the download cache when available.
+        """
+        if archive_hash:
+            cached = download_cache.lookup_extracted(archive_hash)
+            if cached:
+                members = select_members(cached["entries"])
+                if members is not None and all(member in cached["members"] for member in members):
+                    # A member evicted meanwhile falls back to extracting the archive
+                    if all(download_cache.copy_blob(cached["members"][member], os.path.join(destination, member)) for member in members):
+                        return cached["entries"]
+
+        archive = self.open_zip_archive(archivePath)
+        if archive is None:
+            command = [unzip_path, "x", "-y", archivePath, f"-o{destination}"]
+            subprocess.run(command, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            entries = os.listdir(destination)
+            members = select_members(entries)
+        else:
+            with archive:
+                entries = list(dict.fromkeys(info.filename.split("/", 1)[0] for info in archive.infolist()))
+                members = select_members(entries)
+                if members is None:
+                    archive.extractall(destination)
+                else:
+                    for info in archive.infolist():
+                        if info.is_dir() or info.filename not in members:
+                            continue
+                        with archive.open(info) as src, open(os.path.join(destination, info.filename), "wb") as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        if members is not None:
+            download_cache.store_extracted(archive_hash, entries, {member: os.path.join(destination, member) for member in members if os.path.isfile(os.path.join(destination, member))})
+        return entries
+
+    def open_zip_archive(self, archivePath):
+        # Only hand zips to zipfile when every entry is readable and named the same way 7z would name it
+        supported_methods = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)
+        if not zipfile.is_zipfile(archivePath):
+            return None
+
+        archive = zipfile.ZipFile(archivePath)
+        for info in archive.infolist():
+            encrypted = info.flag_bits & 0x1
+            legacy_encoded_name = not info.flag_bits & 0x800 and not info.filename.isascii()
+            if encrypted or legacy_encoded_name or info.compress_type not in supported_methods:
+                archive.close()
+                return None
+        return archive
+
+    def finish_cancelled(self):
+        self.message.emit(tr("Download cancelled."), "failure")
+        self.finished.emit(1)
     
     def modify_fling_settings(self, removeBgMusic):
+        # FLiNG settings files are shared by every trainer, serialize concurrent jobs
+        with self.fling_settings_lock:
+            self.apply_fling_settings(removeBgMusic)
+
+    def apply_fling_settings(self, removeBgMusic):
         # replace bg music in Documents folder
         username = os.getlogin()
         flingSettings_path = f"C:/Users/{username}/Documents/FLiNGTrainer"
@@ -1471,36 +2578,209 @@ class DownloadTrainersThread(DownloadBaseThread):
                         file.write(line)
 
     def remove_bgMusic(self, source_exe, resource_type_list):
-        # Base case
-        if not resource_type_list:
+        # Overwrite the embedded background music with an empty midi in place, resource layout stays untouched
+        with open(emptyMidi_path, "rb") as f:
+            emptyMidi = f.read()
+
+        try:
+            replaced, skipped = replace_resource_type(source_exe, resource_type_list, emptyMidi)
+        except Exception as e:
+            print(f"Failed to remove background music from {source_exe}: {str(e)}")
+            skipped = 1
+        if skipped:
+            self.message.emit(tr("Failed to remove trainer background music: ") + os.path.basename(source_exe), "failure")
+
+
+class DownloadManager(QObject):
+    jobAdded = pyqtSignal(int, str)
+    jobMessage = pyqtSignal(int, str, str)
+    jobProgress = pyqtSignal(int, int)
+    jobFinished = pyqtSignal(int, int)
+    messageBox = pyqtSignal(str, str, str)
+    busyChanged = pyqtSignal(bool)
+
+    # Lower value runs first; user initiated downloads jump ahead of background updates
+    USER_PRIORITY = 0
+    UPDATE_PRIORITY = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.window = parent
+        self.pendingJobs = []  # heap of (priority, job id, (trainer entry, trainer path, update url))
+        self.activeJobs = {}  # {job id: DownloadTrainersThread}
+        self.jobNames = {}  # {job id: display name}, for queued and running jobs
+        self.nextJobId = 0
+
+    def max_workers(self):
+        return max(1, int(settings["downloadWorkers"]))
+
+    def is_busy(self):
+        return bool(self.pendingJobs or self.activeJobs)
+
+    def enqueue(self, displayName, priority, trainerEntry=None, trainerPath=None, updateUrl=None):
+        if displayName in self.jobNames.values():
+            return None
+
+        wasBusy = self.is_busy()
+        jobId = self.nextJobId
+        self.nextJobId += 1
+        self.jobNames[jobId] = displayName
+        heapq.heappush(self.pendingJobs, (priority, jobId, (trainerEntry, trainerPath, updateUrl)))
+        self.jobAdded.emit(jobId, displayName)
+        self.jobMessage.emit(jobId, tr("Queued"), "")
+        if not wasBusy:
+            self.busyChanged.emit(True)
+
+        self.start_pending()
+        return jobId
+
+    def start_pending(self):
+        while self.pendingJobs and len(self.activeJobs) < self.max_workers():
+            priority, jobId, (trainerEntry, trainerPath, updateUrl) = heapq.heappop(self.pendingJobs)
+
+            if not self.activeJobs:
+                DownloadWorkspace.sweep_stale()
+
+            update = trainerPath is not None
+            download_thread = DownloadTrainersThread(trainerEntry, self.window.trainers, self.window.trainerDownloadPath, update, trainerPath, updateUrl, self.window)
+            download_thread.message.connect(lambda message, type, jobId=jobId: self.jobMessage.emit(jobId, message, type or ""))
+            download_thread.progress.connect(lambda percent, jobId=jobId: self.jobProgress.emit(jobId, percent))
+            download_thread.messageBox.connect(self.messageBox)
+            download_thread.finished.connect(lambda status, jobId=jobId: self.on_job_finished(jobId, status))
+            self.activeJobs[jobId] = download_thread
+            download_thread.start()
+
+    def cancel(self, jobId):
+        if jobId in self.activeJobs:
+            self.activeJobs[jobId].cancel()
             return
 
-        resource_type = resource_type_list.pop(0)
+        for index, (_, pendingId, _) in enumerate(self.pendingJobs):
+            if pendingId == jobId:
+                self.pendingJobs.pop(index)
+                heapq.heapify(self.pendingJobs)
+                self.jobMessage.emit(jobId, tr("Download cancelled."), "failure")
+                self.on_job_finished(jobId, 1)
+                return
 
-        # Define paths and files
-        tempLog = os.path.join(DOWNLOAD_TEMP_DIR, "rh.log")
+    def on_job_finished(self, jobId, status):
+        self.activeJobs.pop(jobId, None)
+        self.jobNames.pop(jobId, None)
+        self.jobFinished.emit(jobId, status)
+        self.start_pending()
+        if not self.is_busy():
+            self.busyChanged.emit(False)
+
+
+class JobScheduler(QObject):
+    """
+    Runs the periodic background jobs (database refresh, trainer update checks).
+    Each job's last run, next run and outcome persist in jobs.json, so a restart only reruns jobs whose data went stale.
+    Jobs start after a startup delay, staggered and jittered, and failed runs are retried with exponential backoff.
+    """
+    state_file = os.path.join(DATABASE_PATH, "jobs.json")
+    startup_delay = 20  # seconds before the first job, leaving startup to the UI
+    stagger = 30  # seconds between jobs due at the same time
+    jitter = 0.1  # fraction of the interval a successful run's next run is shifted by
+    retry_delay = 300  # first retry after a failure, doubled per consecutive failure up to the interval
 
-        # Remove background music from executable
-        command = [resourceHacker_path, "-open", source_exe, "-save", source_exe,
-                   "-action", "delete", "-mask", f"{resource_type},,", "-log", tempLog]
-        subprocess.run(command, creationflags=subprocess.CREATE_NO_WINDOW)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = {}  # {job name: (interval in seconds, callable returning the job's unstarted thread, enabled callable)}
+        self.running = set()
+        self.failed = set()  # running jobs that reported an error
+        self.state = self.load_state()  # {job name: {"last_run", "next_run", "outcome", "failures"}}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_due)
 
-        # Read the log file
-        with open(tempLog, 'r', encoding='utf-16-le') as file:
-            log_content = file.read()
+    def load_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print("Error loading job schedule: " + str(e))
+            return {}
+
+    def save_state(self):
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=4)
+        os.replace(temp_file, self.state_file)
+
+    def add_job(self, name, interval, start, enabled):
+        # Job names double as status bar widget names, which is what the threads' finished signal carries
+        self.jobs[name] = (interval, start, enabled)
+        self.state.setdefault(name, {"last_run": 0, "next_run": 0, "outcome": "", "failures": 0})
+
+    def start(self):
+        # Jobs still fresh from a previous session keep their next run, overdue ones are staggered after startup
+        now = time.time()
+        earliest = now + self.startup_delay
+        for name in sorted(self.jobs, key=lambda name: self.state[name]["next_run"]):
+            job_state = self.state[name]
+            if job_state["next_run"] < earliest:
+                job_state["next_run"] = earliest + random.uniform(0, self.stagger / 2)
+                earliest += self.stagger
+        self.save_state()
+        self.reschedule()
+
+    def run_now(self, *names):
+        # Manual runs bypass freshness and the enabled setting
+        for name in names:
+            self.state[name]["next_run"] = 0
+        self.run_due(forced=names)
+
+    def reschedule(self):
+        pending = [self.state[name]["next_run"] for name in self.jobs if name not in self.running]
+        if pending:
+            self.timer.start(int(max(0, min(pending) - time.time()) * 1000))
+
+    def run_due(self, forced=()):
+        now = time.time()
+        for name, (interval, start, enabled) in self.jobs.items():
+            job_state = self.state[name]
+            if name in self.running or job_state["next_run"] > now:
+                continue
 
-        # Check for deleted resource in log
-        pattern = r"Deleted:\s*(\w+),(\d+),(\d+)"
-        match = re.search(pattern, log_content)
+            thread = start() if name in forced or enabled() else None
+            if thread is None:
+                job_state["next_run"] = now + interval
+                continue
 
-        if match:
-            # Resource was deleted; prepare to add the empty midi
-            resource_id = match.group(2)
-            locale_id = match.group(3)
-            resource = ",".join([resource_type, resource_id, locale_id])
-            command = [resourceHacker_path, "-open", source_exe, "-save", source_exe,
-                       "-action", "addoverwrite", "-res", emptyMidi_path, "-mask", resource]
-            subprocess.run(command, creationflags=subprocess.CREATE_NO_WINDOW)
+            self.running.add(name)
+            self.failed.discard(name)
+            # Bound methods, so the signals are queued to this object's thread; connected before the start so a job
+            # that ends right away can't finish unnoticed
+            thread.update.connect(self.on_job_update)
+            thread.finished.connect(self.on_job_finished)
+            thread.start()
+
+        self.save_state()
+        self.reschedule()
+
+    def on_job_update(self, name, message, state):
+        if state == "error":
+            self.failed.add(name)
+
+    def on_job_finished(self, name):
+        interval = self.jobs[name][0]
+        job_state = self.state[name]
+        now = time.time()
+        job_state["last_run"] = now
+
+        if name in self.failed:
+            job_state["failures"] += 1
+            job_state["outcome"] = "failed"
+            job_state["next_run"] = now + min(interval, self.retry_delay * 2 ** (job_state["failures"] - 1))
         else:
-            # Try the next resource type if any remain
-            self.remove_bgMusic(source_exe, resource_type_list)
+            job_state["failures"] = 0
+            job_state["outcome"] = "success"
+            job_state["next_run"] = now + interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+        self.running.discard(name)
+        self.failed.discard(name)
+        self.save_state()
+        self.reschedule()
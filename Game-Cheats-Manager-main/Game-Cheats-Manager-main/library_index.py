@@ -0,0 +1,249 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+from config import *
+
+
+class LibraryIndex:
+    """
+    Persistent library index in GCM Settings/db/library.db.
+    One row per installed trainer keyed by normcased path: name, size, mtime, collation key and install date kept
+    current by the library scan, plus analysis results (content hash, tag name, edition, build date, source URL, check state)
+    that are only trusted while the file's size and mtime still match what was analyzed.
+    Also holds the FLiNG update catalog (last updated date per trainer page) the update checker joins against.
+    """
+    schema_version = 5
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.migrate()
+
+    def migrate(self):
+        with self.lock, self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self.connection.execute("""
+                    CREATE TABLE IF NOT EXISTS trainers (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        tag_name TEXT,
+                        build_date TEXT,
+                        source_url TEXT,
+                        checked_at REAL,
+                        check_result TEXT
+                    )
+                """)
+            if version < 2:
+                self.connection.execute("""
+                    CREATE TABLE IF NOT EXISTS fling_updates (
+                        url TEXT PRIMARY KEY,
+                        name TEXT,
+                        last_updated TEXT NOT NULL,
+                        seen TEXT NOT NULL
+                    )
+                """)
+                self.connection.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+            if version < 3:
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN last_updated TEXT")
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN next_check REAL")
+            if version < 4:
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN name TEXT")
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN collation_key TEXT")
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN content_hash TEXT")
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN installed_at REAL")
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN analyzed INTEGER NOT NULL DEFAULT 0")
+                # Rows so far were only written by the update checker's analysis
+                self.connection.execute("UPDATE trainers SET analyzed = 1")
+            if version < 5:
+                # Filled in by the duplicate detection for trainers analyzed before
+                self.connection.execute("ALTER TABLE trainers ADD COLUMN edition TEXT")
+            self.connection.execute(f"PRAGMA user_version = {self.schema_version}")
+
+    def get_metadata(self, path, file_stat=None):
+        """
+        Return the cached row for path as a dict, or None when missing or the file changed since it was analyzed.
+        """
+        file_stat = file_stat or os.stat(path)
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM trainers WHERE path = ?", (os.path.normcase(path),)).fetchone()
+        if row is None or not row["analyzed"] or row["size"] != file_stat.st_size or row["mtime_ns"] != file_stat.st_mtime_ns:
+            return None
+        return dict(row)
+
+    def set_metadata(self, path, file_stat, tag_name, edition, build_date, content_hash):
+        # Analysis results; a changed file also invalidates its previous remote check and is due right away
+        with self.lock, self.connection:
+            self.connection.execute("""
+                INSERT INTO trainers (path, name, size, mtime_ns, tag_name, edition, build_date, content_hash, installed_at, analyzed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns, tag_name = excluded.tag_name, edition = excluded.edition,
+                    build_date = excluded.build_date, content_hash = excluded.content_hash, analyzed = 1,
+                    source_url = NULL, checked_at = NULL, check_result = NULL, last_updated = NULL, next_check = NULL
+            """, (os.path.normcase(path), os.path.splitext(os.path.basename(path))[0], file_stat.st_size,
+                  file_stat.st_mtime_ns, tag_name, edition, build_date, content_hash, time.time()))
+
+    def record_check(self, path, check_result, next_check, source_url=None, last_updated=None):
+        # check_result: "current", "outdated", "unmatched" or "untagged"; next_check: epoch seconds of the next remote check
+        with self.lock, self.connection:
+            self.connection.execute("""
+                UPDATE trainers SET check_result = ?, source_url = COALESCE(?, source_url), last_updated = COALESCE(?, last_updated),
+                    checked_at = ?, next_check = ?
+                WHERE path = ?
+            """, (check_result, source_url, last_updated, time.time(), next_check, os.path.normcase(path)))
+
+    def due_for_check(self, paths, budget):
+        """
+        Return up to budget of paths (normcased) whose next check is due, most overdue first; never checked ones lead.
+        """
+        paths = set(paths)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT path FROM trainers WHERE next_check IS NULL OR next_check <= ? ORDER BY next_check IS NOT NULL, next_check",
+                (time.time(),)
+            ).fetchall()
+        return [row["path"] for row in rows if row["path"] in paths][:budget]
+
+    # ===========================================================================
+    # Library listing
+    # ===========================================================================
+    def list_trainers(self, folder):
+        """
+        Indexed trainers directly inside folder as [(name, path, size, mtime_ns, collation key)], for painting
+        the library before the folder is scanned. Paths are rebuilt from folder and name, the stored key is normcased.
+        """
+        folder_key = os.path.normcase(os.path.normpath(folder))
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT path, name, size, mtime_ns, collation_key FROM trainers WHERE substr(path, 1, ?) = ?",
+                (len(folder_key) + 1, folder_key + os.sep)
+            ).fetchall()
+        return [(row["name"], os.path.join(folder, row["name"] + os.path.splitext(row["path"])[1]), row["size"], row["mtime_ns"], row["collation_key"])
+                for row in rows if row["name"] and os.path.dirname(row["path"]) == folder_key]
+
+    def sync_trainers(self, upserts=(), removed=(), renamed=()):
+        """
+        Apply a library scan delta in one transaction.
+        upserts: [(name, path, size, mtime_ns, collation key)]; a size or mtime change drops the analysis results.
+        removed: [path]; renamed: [(old path, new path)], keeping the row's metadata and install date.
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            for old_path, new_path in renamed:
+                self.connection.execute("DELETE FROM trainers WHERE path = ?", (os.path.normcase(new_path),))
+                self.connection.execute("UPDATE trainers SET path = ? WHERE path = ?", (os.path.normcase(new_path), os.path.normcase(old_path)))
+            self.connection.executemany("DELETE FROM trainers WHERE path = ?", [(os.path.normcase(path),) for path in removed])
+            # Right-hand sides see the old row, so the comparisons below are against the previous size and mtime
+            self.connection.executemany("""
+                INSERT INTO trainers (path, name, size, mtime_ns, collation_key, installed_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    name = excluded.name, collation_key = excluded.collation_key,
+                    analyzed = analyzed AND size = excluded.size AND mtime_ns = excluded.mtime_ns,
+                    content_hash = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN content_hash END,
+                    size = excluded.size, mtime_ns = excluded.mtime_ns
+            """, [(os.path.normcase(path), name, size, mtime_ns, collation_key, now) for name, path, size, mtime_ns, collation_key in upserts])
+
+    def library_hashes(self, folder):
+        # [(path, size, mtime_ns, content hash or None)] of the indexed trainers directly inside folder
+        folder_key = os.path.normcase(os.path.normpath(folder))
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT path, size, mtime_ns, content_hash FROM trainers WHERE substr(path, 1, ?) = ?",
+                (len(folder_key) + 1, folder_key + os.sep)
+            ).fetchall()
+        return [tuple(row) for row in rows if os.path.dirname(row["path"]) == folder_key]
+
+    def stored_hashes(self, paths):
+        # {normcased path: (size, mtime_ns, content hash)} of the given trainers that were hashed, even if since removed
+        keys = [os.path.normcase(path) for path in paths]
+        if not keys:
+            return {}
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT path, size, mtime_ns, content_hash FROM trainers WHERE content_hash IS NOT NULL AND path IN ({', '.join('?' * len(keys))})",
+                keys
+            ).fetchall()
+        return {row["path"]: (row["size"], row["mtime_ns"], row["content_hash"]) for row in rows}
+
+    def record_hash(self, path, file_stat, content_hash):
+        # Content hash of a file hashed outside of the update checker's analysis (imports, duplicate detection)
+        with self.lock, self.connection:
+            self.connection.execute("""
+                INSERT INTO trainers (path, name, size, mtime_ns, content_hash, installed_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    analyzed = analyzed AND size = excluded.size AND mtime_ns = excluded.mtime_ns,
+                    size = excluded.size, mtime_ns = excluded.mtime_ns
+            """, (os.path.normcase(path), os.path.splitext(os.path.basename(path))[0], file_stat.st_size,
+                  file_stat.st_mtime_ns, content_hash, time.time()))
+
+    def record_edition(self, path, file_stat, edition):
+        # Edition of a trainer analyzed before editions were indexed, only while the file is still the one analyzed
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE trainers SET edition = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (edition, os.path.normcase(path), file_stat.st_size, file_stat.st_mtime_ns)
+            )
+
+    def move_folder(self, old_folder, new_folder):
+        # Re-key the rows of a migrated library so its metadata and install dates carry over
+        old_key = os.path.normcase(os.path.normpath(old_folder)) + os.sep
+        new_key = os.path.normcase(os.path.normpath(new_folder)) + os.sep
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM trainers WHERE substr(path, 1, ?) = ?", (len(new_key), new_key))
+            self.connection.execute(
+                "UPDATE trainers SET path = ? || substr(path, ?) WHERE substr(path, 1, ?) = ?",
+                (new_key, len(old_key) + 1, len(old_key), old_key)
+            )
+
+    def get_state(self, key):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    # ===========================================================================
+    # FLiNG update catalog
+    # ===========================================================================
+    def record_catalog(self, entries, feed_oldest=None):
+        """
+        Upsert listing entries [(url, name, last updated "YYYY-MM-DD")].
+        feed_oldest is the oldest date on a front page listing: it extends the window in which every upstream update
+        was observed, or restarts that window when the previous listing is no longer reached (a gap).
+        """
+        today = datetime.date.today().isoformat()
+        with self.lock, self.connection:
+            if feed_oldest is not None:
+                row = self.connection.execute("SELECT value FROM state WHERE key = 'last_feed'").fetchone()
+                if row is None or feed_oldest > row["value"]:
+                    self.connection.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('coverage_since', ?)", (feed_oldest,))
+                self.connection.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('last_feed', ?)", (today,))
+            self.connection.executemany("""
+                INSERT INTO fling_updates (url, name, last_updated, seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET name = excluded.name, last_updated = excluded.last_updated, seen = excluded.seen
+            """, [(url, name, last_updated, today) for url, name, last_updated in entries])
+
+    def catalog_matches(self):
+        """
+        Join installed trainers against the catalog in one query.
+        Returns {normcased path: (build date, last updated, url)} for trainers whose catalog row was seen inside the
+        coverage window, so no later upstream update can have been missed.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM state WHERE key = 'coverage_since'").fetchone()
+            if row is None:
+                return {}
+            rows = self.connection.execute("""
+                SELECT trainers.path, trainers.build_date, fling_updates.last_updated, fling_updates.url
+                FROM trainers JOIN fling_updates ON fling_updates.url = trainers.source_url
+                WHERE fling_updates.seen >= ? AND trainers.analyzed AND trainers.build_date IS NOT NULL
+            """, (row["value"],)).fetchall()
+        return {row["path"]: (row["build_date"], row["last_updated"], row["url"]) for row in rows}
+
+
+library_index = LibraryIndex(os.path.join(DATABASE_PATH, "library.db"))
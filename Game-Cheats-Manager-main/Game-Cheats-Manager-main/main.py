@@ -1,12 +1,10 @@
 import os
-from queue import Queue
-import shutil
 import stat
 import sys
 
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QColor, QFont, QFontDatabase, QIcon, QPixmap
-from PyQt6.QtWidgets import QApplication, QFileDialog, QGridLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QMainWindow, QMessageBox, QPushButton, QStatusBar, QVBoxLayout, QWidget
+from PyQt6.QtWidgets import QApplication, QFileDialog, QGridLayout, QHBoxLayout, QLabel, QLineEdit, QListView, QListWidget, QListWidgetItem, QMainWindow, QMenu, QMessageBox, QPushButton, QStatusBar, QVBoxLayout, QWidget
 from tendo import singleton
 
 from helper import *
@@ -58,11 +56,7 @@ class GameCheatsManager(QMainWindow):
         self.trainers = {}  # Store installed trainers: {trainer name: trainer path}
         self.searchable = True  # able to search online trainers or not
         self.downloadable = False  # able to double click on download list or not
-        self.downloadQueue = Queue()
-        self.currentlyDownloading = False
-        self.currentlyUpdatingTrainers = False
-        self.currentlyUpdatingFling = False
-        self.currentlyUpdatingTrans = False
+        self.downloadJobItems = {}  # {job id: [list item, display name, last status message]}
 
         # Window references
         self.settings_window = None
@@ -90,6 +84,10 @@ class GameCheatsManager(QMainWindow):
         importAction.triggered.connect(self.import_files)
         optionMenu.addAction(importAction)
 
+        self.duplicatesAction = QAction(tr("Find Duplicate Trainers"), self)
+        self.duplicatesAction.triggered.connect(self.find_duplicates)
+        optionMenu.addAction(self.duplicatesAction)
+
         openDirectoryAction = QAction(tr("Open Trainer Download Path"), self)
         openDirectoryAction.triggered.connect(self.open_trainer_directory)
         optionMenu.addAction(openDirectoryAction)
@@ -143,8 +141,18 @@ class GameCheatsManager(QMainWindow):
         self.trainerSearchEntry.textChanged.connect(self.update_list)
 
         # Display installed trainers
-        self.flingListBox = QListWidget()
-        self.flingListBox.itemActivated.connect(self.launch_trainer)
+        self.trainerModel = TrainerListModel(self)
+        self.trainerProxyModel = TrainerFilterProxyModel(self)
+        self.trainerProxyModel.setSourceModel(self.trainerModel)
+        self.trainerProxyModel.sort(0)
+        self.trainerLibrary = TrainerLibrary(self.trainerModel, self.trainerDownloadPath, self)
+        self.trainerLibrary.trainersChanged.connect(self.on_trainers_changed)
+        self.trainers = self.trainerModel.trainers()
+        self.flingListBox = QListView()
+        self.flingListBox.setModel(self.trainerProxyModel)
+        self.flingListBox.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.flingListBox.setUniformItemSizes(True)
+        self.flingListBox.activated.connect(self.launch_trainer)
         trainersLayout.addWidget(self.flingListBox)
 
         # Launch and delete buttons
@@ -187,6 +195,22 @@ class GameCheatsManager(QMainWindow):
         self.downloadListBox.itemActivated.connect(self.on_download_start)
         downloadsLayout.addWidget(self.downloadListBox)
 
+        # Download jobs, one status row per queued or running download
+        self.downloadJobsListBox = QListWidget()
+        self.downloadJobsListBox.setMaximumHeight(100)
+        self.downloadJobsListBox.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.downloadJobsListBox.customContextMenuRequested.connect(self.show_download_job_menu)
+        self.downloadJobsListBox.hide()
+        downloadsLayout.addWidget(self.downloadJobsListBox)
+
+        self.downloadManager = DownloadManager(self)
+        self.downloadManager.jobAdded.connect(self.on_download_job_added)
+        self.downloadManager.jobMessage.connect(self.on_download_job_message)
+        self.downloadManager.jobProgress.connect(self.on_download_job_progress)
+        self.downloadManager.jobFinished.connect(self.on_download_finished)
+        self.downloadManager.messageBox.connect(self.on_message_box)
+        self.downloadManager.busyChanged.connect(self.on_download_busy_changed)
+
         # Change trainer download path
         changeDownloadPathLayout = QHBoxLayout()
         changeDownloadPathLayout.setSpacing(5)
@@ -201,18 +225,17 @@ class GameCheatsManager(QMainWindow):
         changeDownloadPathLayout.addWidget(self.fileDialogButton)
         self.fileDialogButton.clicked.connect(self.change_path)
 
-        self.show_cheats()
-
         # Show warning pop up
         if settings["showWarning"]:
             dialog = CopyRightWarning(self)
             dialog.show()
 
         # Update database, trainer update
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.on_main_interval)
-        self.on_main_interval()
-        self.timer.start(3600000)
+        self.jobScheduler = JobScheduler(self)
+        self.jobScheduler.add_job("fling", 3600, self.fetch_fling_site, lambda: settings["autoUpdateDatabase"])
+        self.jobScheduler.add_job("details", 3600, self.fetch_trainer_details, lambda: settings["autoUpdateDatabase"])
+        self.jobScheduler.add_job("trainerUpdate", 3600, self.check_trainer_updates, lambda: settings["autoUpdate"])
+        self.jobScheduler.start()
 
     # ===========================================================================
     # Core functions
@@ -252,7 +275,7 @@ class GameCheatsManager(QMainWindow):
 
     def enable_download_widgets(self):
         self.downloadSearchEntry.setEnabled(True)
-        self.fileDialogButton.setEnabled(True)
+        self.fileDialogButton.setEnabled(not self.downloadManager.is_busy())
 
     def disable_all_widgets(self):
         self.downloadSearchEntry.setEnabled(False)
@@ -269,37 +292,20 @@ class GameCheatsManager(QMainWindow):
         self.deleteButton.setEnabled(True)
 
     def update_list(self):
-        search_text = self.trainerSearchEntry.text().lower()
-        if search_text == "":
-            self.show_cheats()
-            return
-
-        self.flingListBox.clear()
-        for trainerName in self.trainers.keys():
-            if search_text in trainerName.lower():
-                self.flingListBox.addItem(trainerName)
+        self.trainerProxyModel.set_query(self.trainerSearchEntry.text())
 
     def show_cheats(self):
-        self.flingListBox.clear()
-        self.trainers = {}
-        entries = sorted(
-            os.scandir(self.trainerDownloadPath),
-            key=lambda dirent: sort_trainers_key(dirent.name)
-        )
+        # Apply pending changes right away instead of waiting for the watcher
+        self.trainerLibrary.refresh()
 
-        for trainer in entries:
-            trainerPath = os.path.normpath(trainer.path)
-            trainerName, trainerExt = os.path.splitext(os.path.basename(trainerPath))
-            if trainerExt.lower() == ".exe" and os.path.getsize(trainerPath) != 0:
-                self.flingListBox.addItem(trainerName)
-                self.trainers[trainerName] = trainerPath
+    def on_trainers_changed(self):
+        self.trainers = self.trainerModel.trainers()
 
     def launch_trainer(self):
         try:
-            selection = self.flingListBox.currentRow()
-            if selection != -1:
-                trainerName = self.flingListBox.item(selection).text()
-                os.startfile(os.path.normpath(self.trainers[trainerName]))
+            index = self.flingListBox.currentIndex()
+            if index.isValid():
+                os.startfile(os.path.normpath(index.data(TrainerListModel.PathRole)))
         except OSError as e:
             if e.winerror == 1223:
                 print("[Launch Trainer] was canceled by the user.")
@@ -307,10 +313,10 @@ class GameCheatsManager(QMainWindow):
                 raise
 
     def delete_trainer(self):
-        index = self.flingListBox.currentRow()
-        if index != -1:
-            trainerName = self.flingListBox.item(index).text()
-            trainerPath = self.trainers[trainerName]
+        index = self.flingListBox.currentIndex()
+        if index.isValid():
+            trainerName = index.data()
+            trainerPath = index.data(TrainerListModel.PathRole)
         
             msg_box = QMessageBox(
                 QMessageBox.Icon.Question,
@@ -330,7 +336,6 @@ class GameCheatsManager(QMainWindow):
                 try:
                     os.chmod(trainerPath, stat.S_IWRITE)
                     os.remove(trainerPath)
-                    self.flingListBox.takeItem(index)
                     self.show_cheats()
                 except PermissionError as e:
                     QMessageBox.critical(self, tr("Error"), tr("Trainer is currently in use, please close any programs using the file and try again."))
@@ -354,9 +359,13 @@ class GameCheatsManager(QMainWindow):
                 self.enable_all_widgets()
                 return
 
-            self.downloadListBox.addItem(tr("Migrating existing trainers..."))
+            # Progress updates this line, other messages may be added below it meanwhile
+            self.migrationItem = QListWidgetItem(tr("Migrating existing trainers..."))
+            self.downloadListBox.addItem(self.migrationItem)
+            self.trainerLibrary.suspend()
             migration_thread = PathChangeThread(self.trainerDownloadPath, folder, self)
             migration_thread.finished.connect(self.on_migration_finished)
+            migration_thread.progress.connect(self.on_migration_progress)
             migration_thread.error.connect(self.on_migration_error)
             migration_thread.start()
         
@@ -377,65 +386,94 @@ class GameCheatsManager(QMainWindow):
         display_thread.start()
     
     def fetch_database(self):
-        if not self.currentlyUpdatingFling:
-            self.currentlyUpdatingFling = True
-            fetch_fling_site_thread = FetchFlingSite(self)
-            fetch_fling_site_thread.message.connect(self.on_status_load)
-            fetch_fling_site_thread.update.connect(self.on_status_update)
-            fetch_fling_site_thread.finished.connect(self.on_interval_finished)
-            fetch_fling_site_thread.start()
-
-        if not self.currentlyUpdatingTrans:
-            self.currentlyUpdatingTrans = True
-            fetch_trainer_details_thread = FetchTrainerDetails(self)
-            fetch_trainer_details_thread.message.connect(self.on_status_load)
-            fetch_trainer_details_thread.update.connect(self.on_status_update)
-            fetch_trainer_details_thread.finished.connect(self.on_interval_finished)
-            fetch_trainer_details_thread.start()
-    
+        self.jobScheduler.run_now("fling", "details")
+
     def update_trainers(self):
-        if not self.currentlyUpdatingTrainers:
-            self.currentlyUpdatingTrainers = True
-            trainer_update_thread = UpdateTrainers(self.trainers, self)
-            trainer_update_thread.message.connect(self.on_status_load)
-            trainer_update_thread.update.connect(self.on_status_update)
-            trainer_update_thread.updateTrainer.connect(self.on_trainer_update)
-            trainer_update_thread.finished.connect(self.on_interval_finished)
-            trainer_update_thread.start()
-    
-    def on_main_interval(self):
-        if settings["autoUpdateDatabase"]:
-            self.fetch_database()
-        if settings["autoUpdate"]:
-            self.update_trainers()
+        self.jobScheduler.run_now("trainerUpdate")
+
+    def fetch_fling_site(self):
+        fetch_fling_site_thread = FetchFlingSite(self)
+        fetch_fling_site_thread.message.connect(self.on_status_load)
+        fetch_fling_site_thread.update.connect(self.on_status_update)
+        fetch_fling_site_thread.finished.connect(self.on_interval_finished)
+        return fetch_fling_site_thread
+
+    def fetch_trainer_details(self):
+        fetch_trainer_details_thread = FetchTrainerDetails(self)
+        fetch_trainer_details_thread.message.connect(self.on_status_load)
+        fetch_trainer_details_thread.update.connect(self.on_status_update)
+        fetch_trainer_details_thread.finished.connect(self.on_interval_finished)
+        return fetch_trainer_details_thread
+
+    def check_trainer_updates(self):
+        trainer_update_thread = UpdateTrainers(self.trainers, self)
+        trainer_update_thread.message.connect(self.on_status_load)
+        trainer_update_thread.update.connect(self.on_status_update)
+        trainer_update_thread.updateTrainer.connect(self.on_trainer_update)
+        trainer_update_thread.finished.connect(self.on_interval_finished)
+        return trainer_update_thread
 
     def download_trainers(self, index):
-        self.enqueue_download(index, self.trainers, self.trainerDownloadPath, False, None, None)
+        # Capture the selected result now, search results may be replaced before the job starts
+        trainerEntry = list(DownloadBaseThread.trainer_urls.items())[index]
+        displayName = self.downloadListBox.item(index).text().split(". ", 1)[-1]
+        if self.downloadManager.enqueue(displayName, DownloadManager.USER_PRIORITY, trainerEntry=trainerEntry) is None:
+            self.on_message(tr("Trainer is already being downloaded."), "failure")
     
     def on_trainer_update(self, trainerPath, updateUrl):
-        self.enqueue_download(None, None, self.trainerDownloadPath, True, trainerPath, updateUrl)
-    
-    def enqueue_download(self, index, trainers, trainerDownloadPath, update, trainerPath, updateUrl):
-        self.downloadQueue.put((index, trainers, trainerDownloadPath, update, trainerPath, updateUrl))
-        if not self.currentlyDownloading:
-            self.start_next_download()
-
-    def start_next_download(self):
-        if not self.downloadQueue.empty():
-            self.currentlyDownloading = True
-            self.disable_download_widgets()
-            self.downloadListBox.clear()
-            self.downloadable = False
-            self.searchable = False
-
-            index, trainers, trainerDownloadPath, update, trainerPath, updateUrl = self.downloadQueue.get()
-            download_thread = DownloadTrainersThread(index, trainers, trainerDownloadPath, update, trainerPath, updateUrl, self)
-            download_thread.message.connect(self.on_message)
-            download_thread.messageBox.connect(self.on_message_box)
-            download_thread.finished.connect(self.on_download_finished)
-            download_thread.start()
-        else:
-            self.currentlyDownloading = False
+        trainerName = os.path.splitext(os.path.basename(trainerPath))[0]
+        self.downloadManager.enqueue(trainerName, DownloadManager.UPDATE_PRIORITY, trainerPath=trainerPath, updateUrl=updateUrl)
+
+    def show_download_job_menu(self, pos):
+        item = self.downloadJobsListBox.itemAt(pos)
+        if item is None:
+            return
+        jobId = item.data(Qt.ItemDataRole.UserRole)
+        if jobId not in self.downloadManager.jobNames:
+            return
+
+        menu = QMenu(self)
+        cancelAction = menu.addAction(tr("Cancel Download"))
+        if menu.exec(self.downloadJobsListBox.mapToGlobal(pos)) == cancelAction:
+            self.downloadManager.cancel(jobId)
+
+    def on_download_job_added(self, jobId, displayName):
+        item = QListWidgetItem(displayName)
+        item.setData(Qt.ItemDataRole.UserRole, jobId)
+        self.downloadJobsListBox.addItem(item)
+        self.downloadJobsListBox.show()
+        self.downloadJobItems[jobId] = [item, displayName, ""]
+
+    def on_download_job_message(self, jobId, message, type):
+        jobItem = self.downloadJobItems.get(jobId)
+        if jobItem is None:
+            return
+        item, displayName, _ = jobItem
+        jobItem[2] = message
+        item.setText(f"{displayName}: {message}")
+
+        if type == "success":
+            item.setBackground(QColor(0, 255, 0, 20))
+        elif type == "failure":
+            item.setBackground(QColor(255, 0, 0, 20))
+
+    def on_download_job_progress(self, jobId, percent):
+        jobItem = self.downloadJobItems.get(jobId)
+        if jobItem is None:
+            return
+        item, displayName, message = jobItem
+        item.setText(f"{displayName}: {message} {percent}%")
+
+    def remove_download_job_item(self, jobId):
+        jobItem = self.downloadJobItems.pop(jobId, None)
+        if jobItem is not None:
+            self.downloadJobsListBox.takeItem(self.downloadJobsListBox.row(jobItem[0]))
+        if not self.downloadJobItems:
+            self.downloadJobsListBox.hide()
+
+    def on_download_busy_changed(self, busy):
+        # Library migration must not run underneath active downloads
+        self.fileDialogButton.setEnabled(not busy)
 
     def on_message(self, message, type=None):
         item = QListWidgetItem(message)
@@ -462,14 +500,22 @@ class GameCheatsManager(QMainWindow):
     def on_migration_error(self, error_message):
         QMessageBox.critical(self, tr("Error"), tr("Error migrating trainers: ") + error_message)
         self.on_message(tr("Failed to change trainer download path."), "failure")
-        self.show_cheats()
+        self.trainerLibrary.set_path(self.trainerDownloadPath)
         self.enable_all_widgets()
     
+    def on_migration_progress(self, percent):
+        try:
+            self.migrationItem.setText(tr("Migrating existing trainers...") + f" {percent}%")
+        except RuntimeError:
+            # The list was cleared meanwhile, taking the line with it
+            pass
+
     def on_migration_finished(self, new_path):
+        library_index.move_folder(self.trainerDownloadPath, new_path)
         self.trainerDownloadPath = new_path
         settings["downloadPath"] = self.trainerDownloadPath
         apply_settings(settings)
-        self.show_cheats()
+        self.trainerLibrary.set_path(self.trainerDownloadPath)
         self.on_message(tr("Migration complete!"), "success")
         self.downloadPathEntry.setText(self.trainerDownloadPath)
         self.enable_all_widgets()
@@ -484,13 +530,8 @@ class GameCheatsManager(QMainWindow):
         self.searchable = True
         self.enable_download_widgets()
     
-    def on_download_finished(self, status):
-        self.downloadable = False
-        self.searchable = True
-        self.enable_download_widgets()
-        self.show_cheats()
-        self.currentlyDownloading = False
-        self.start_next_download()
+    def on_download_finished(self, jobId, status):
+        QTimer.singleShot(8000, lambda: self.remove_download_job_item(jobId))
 
     def on_status_load(self, widgetName, message):
         statusWidget = StatusMessageWidget(widgetName, message)
@@ -505,13 +546,6 @@ class GameCheatsManager(QMainWindow):
         if target:
             target.deleteLater()
 
-        if widgetName == "fling":
-            self.currentlyUpdatingFling = False
-        elif widgetName == "details":
-            self.currentlyUpdatingTrans = False
-        elif widgetName == "trainerUpdate":
-            self.currentlyUpdatingTrainers = False
-
     # ===========================================================================
     # Menu functions
     # ===========================================================================
@@ -526,37 +560,59 @@ class GameCheatsManager(QMainWindow):
     def import_files(self):
         file_names, _ = QFileDialog.getOpenFileNames(self, tr("Select trainers you want to import"), "", "Executable Files (*.exe)")
         if file_names:
+            # The library picks up all imported files in one diff once the import is done
+            self.trainerLibrary.pause()
+            import_thread = ImportTrainersThread(file_names, self.trainerDownloadPath, self)
+            import_thread.message.connect(self.on_message)
+            import_thread.error.connect(self.on_import_error)
+            import_thread.finished.connect(self.on_import_finished)
+            import_thread.start()
+
+    def find_duplicates(self):
+        # One analysis at a time, re-enabled when it finishes
+        self.duplicatesAction.setEnabled(False)
+        duplicates_thread = DuplicateTrainersThread(self.trainers, self)
+        duplicates_thread.message.connect(self.on_status_load)
+        duplicates_thread.result.connect(self.on_duplicates_found)
+        duplicates_thread.finished.connect(self.on_duplicates_finished)
+        duplicates_thread.start()
+
+    def on_duplicates_found(self, groups):
+        if DuplicateTrainersDialog(groups, self).exec():
+            self.show_cheats()
+
+    def on_duplicates_finished(self, widgetName):
+        self.on_interval_finished(widgetName)
+        self.duplicatesAction.setEnabled(True)
+
+    def on_import_error(self, file_name, error_message):
+        QMessageBox.critical(self, tr("Failure"), tr("Failed to import trainer: ") + f"{file_name}\n{error_message}")
+
+    def on_import_finished(self, file_names):
+        self.trainerLibrary.resume()
+        if not file_names:
+            return
+
+        msg_box = QMessageBox(
+            QMessageBox.Icon.Question,
+            tr("Delete original trainers"),
+            tr("Do you want to delete the original trainer files?"),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            self
+        )
+        
+        yes_button = msg_box.button(QMessageBox.StandardButton.Yes)
+        yes_button.setText(tr("Yes"))
+        no_button = msg_box.button(QMessageBox.StandardButton.No)
+        no_button.setText(tr("No"))
+        reply = msg_box.exec()
+
+        if reply == QMessageBox.StandardButton.Yes:
             for file_name in file_names:
                 try:
-                    dst = os.path.join(self.trainerDownloadPath, os.path.basename(file_name))
-                    if os.path.exists(dst):
-                        os.chmod(dst, stat.S_IWRITE)
-                    shutil.copy(file_name, dst)
-                    print("Trainer copied: ", file_name)
+                    os.remove(file_name)
                 except Exception as e:
-                        QMessageBox.critical(self, tr("Failure"), tr("Failed to import trainer: ") + f"{file_name}\n{str(e)}")
-                self.show_cheats()
-
-            msg_box = QMessageBox(
-                QMessageBox.Icon.Question,
-                tr("Delete original trainers"),
-                tr("Do you want to delete the original trainer files?"),
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                self
-            )
-            
-            yes_button = msg_box.button(QMessageBox.StandardButton.Yes)
-            yes_button.setText(tr("Yes"))
-            no_button = msg_box.button(QMessageBox.StandardButton.No)
-            no_button.setText(tr("No"))
-            reply = msg_box.exec()
-
-            if reply == QMessageBox.StandardButton.Yes:
-                for file_name in file_names:
-                    try:
-                        os.remove(file_name)
-                    except Exception as e:
-                        QMessageBox.critical(self, tr("Failure"), tr("Failed to delete original trainer: ") + f"{file_name}\n{str(e)}")
+                    QMessageBox.critical(self, tr("Failure"), tr("Failed to delete original trainer: ") + f"{file_name}\n{str(e)}")
 
     def open_trainer_directory(self):
         os.startfile(self.trainerDownloadPath)
@@ -0,0 +1,237 @@
+import mmap
+import struct
+
+
+class PEResourceError(Exception):
+    pass
+
+
+class ResourceEntry:
+    def __init__(self, type, name, language, data_entry_offset, data_offset, size):
+        self.type = type  # int resource id or str resource name
+        self.name = name
+        self.language = language
+        self.data_entry_offset = data_entry_offset  # file offset of IMAGE_RESOURCE_DATA_ENTRY
+        self.data_offset = data_offset  # file offset of the resource bytes
+        self.size = size
+
+
+class PEFile:
+    """
+    Minimal PE reader/writer over a buffer (bytes or mmap), enough to locate and patch entries of the resource tree.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        if buffer[:2] != b"MZ":
+            raise PEResourceError("Not a PE file: missing MZ header")
+
+        pe_offset = struct.unpack_from("<I", buffer, 0x3C)[0]
+        if buffer[pe_offset:pe_offset + 4] != b"PE\0\0":
+            raise PEResourceError("Not a PE file: missing PE signature")
+
+        coff_offset = pe_offset + 4
+        number_of_sections, = struct.unpack_from("<H", buffer, coff_offset + 2)
+        optional_header_size, = struct.unpack_from("<H", buffer, coff_offset + 16)
+        self.optional_header_offset = coff_offset + 20
+        self.checksum_offset = self.optional_header_offset + 64
+
+        magic, = struct.unpack_from("<H", buffer, self.optional_header_offset)
+        if magic == 0x10B:
+            directory_count_offset = self.optional_header_offset + 92
+        elif magic == 0x20B:
+            directory_count_offset = self.optional_header_offset + 108
+        else:
+            raise PEResourceError(f"Unknown optional header magic {magic:#x}")
+
+        directory_count, = struct.unpack_from("<I", buffer, directory_count_offset)
+        self.resource_rva = 0
+        if directory_count > 2:
+            self.resource_rva, _ = struct.unpack_from("<II", buffer, directory_count_offset + 4 + 2 * 8)
+
+        self.sections = []  # [(virtual address, virtual size, raw size, raw offset)]
+        section_offset = self.optional_header_offset + optional_header_size
+        for index in range(number_of_sections):
+            virtual_size, virtual_address, raw_size, raw_offset = struct.unpack_from("<IIII", buffer, section_offset + index * 40 + 8)
+            self.sections.append((virtual_address, virtual_size, raw_size, raw_offset))
+
+    def rva_to_offset(self, rva):
+        for virtual_address, virtual_size, raw_size, raw_offset in self.sections:
+            if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+                return rva - virtual_address + raw_offset
+        raise PEResourceError(f"RVA {rva:#x} is outside every section")
+
+    def section_bounds(self, file_offset):
+        # File range [start, end) of the raw data of the section holding file_offset
+        for _, _, raw_size, raw_offset in self.sections:
+            if raw_offset <= file_offset < raw_offset + raw_size:
+                return raw_offset, raw_offset + raw_size
+        return 0, len(self.buffer)
+
+    def resources(self):
+        """
+        Yield a ResourceEntry for every leaf of the type/name/language resource tree.
+        """
+        if not self.resource_rva:
+            return
+        root = self.rva_to_offset(self.resource_rva)
+        for type, type_dir in self.directory_entries(root, root):
+            if type_dir is None:
+                continue
+            for name, name_dir in self.directory_entries(root, type_dir):
+                if name_dir is None:
+                    continue
+                for language, data_entry in self.directory_entries(root, name_dir, leaf=True):
+                    data_rva, size = struct.unpack_from("<II", self.buffer, data_entry)
+                    yield ResourceEntry(type, name, language, data_entry, self.rva_to_offset(data_rva), size)
+
+    def directory_entries(self, root, directory, leaf=False):
+        named_count, id_count = struct.unpack_from("<HH", self.buffer, directory + 12)
+        for index in range(named_count + id_count):
+            name_field, offset_field = struct.unpack_from("<II", self.buffer, directory + 16 + index * 8)
+            if name_field & 0x80000000:
+                string_offset = root + (name_field & 0x7FFFFFFF)
+                length, = struct.unpack_from("<H", self.buffer, string_offset)
+                key = bytes(self.buffer[string_offset + 2:string_offset + 2 + length * 2]).decode("utf-16-le")
+            else:
+                key = name_field
+
+            is_directory = bool(offset_field & 0x80000000)
+            if is_directory == leaf:
+                # Malformed tree: leaf where a directory belongs or the other way around
+                yield key, None
+                continue
+            yield key, root + (offset_field & 0x7FFFFFFF)
+
+    def find_resources(self, resource_type):
+        # Resource type names are matched case-insensitively, like the Windows resource loader does
+        if isinstance(resource_type, str):
+            resource_type = resource_type.upper()
+        for entry in self.resources():
+            entry_type = entry.type.upper() if isinstance(entry.type, str) else entry.type
+            if entry_type == resource_type:
+                yield entry
+
+    def read(self, entry):
+        return bytes(self.buffer[entry.data_offset:entry.data_offset + entry.size])
+
+    def replace_in_place(self, entry, data):
+        """
+        Overwrite a resource with data no larger than the original, zero filling the leftover bytes.
+        The section layout stays untouched, only the data and its size field change.
+        """
+        if len(data) > entry.size:
+            raise PEResourceError(f"Replacement of {len(data)} bytes does not fit into resource of {entry.size} bytes")
+        self.buffer[entry.data_offset:entry.data_offset + len(data)] = data
+        self.buffer[entry.data_offset + len(data):entry.data_offset + entry.size] = bytes(entry.size - len(data))
+        struct.pack_into("<I", self.buffer, entry.data_entry_offset + 4, len(data))
+        entry.size = len(data)
+
+    def update_checksum(self):
+        # Standard PE checksum: 16 bit one's complement style sum of the file, checksum field excluded, plus file length
+        old_checksum, = struct.unpack_from("<I", self.buffer, self.checksum_offset)
+        if not old_checksum:
+            return
+        struct.pack_into("<I", self.buffer, self.checksum_offset, 0)
+
+        length = len(self.buffer)
+        with memoryview(self.buffer) as view, view[:length - length % 2].cast("H") as words:
+            total = sum(words)
+        if length % 2:
+            total += self.buffer[length - 1]
+        while total >> 16:
+            total = (total & 0xFFFF) + (total >> 16)
+        struct.pack_into("<I", self.buffer, self.checksum_offset, total + length)
+
+
+def replace_resource_type(file_path, resource_types, data):
+    """
+    Replace every resource of the first type in resource_types present in file_path with data.
+    Edits the memory-mapped file in place. Resources smaller than data can't be replaced without relaying out the
+    section and are left untouched; returns (number replaced, number skipped).
+    """
+    with open(file_path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as buffer:
+            pe = PEFile(buffer)
+            for resource_type in resource_types:
+                entries = list(pe.find_resources(resource_type))
+                if not entries:
+                    continue
+                fitting = [entry for entry in entries if len(data) <= entry.size]
+                for entry in fitting:
+                    pe.replace_in_place(entry, data)
+                if fitting:
+                    pe.update_checksum()
+                    buffer.flush()
+                return len(fitting), len(entries) - len(fitting)
+    return 0, 0
+
+
+RT_VERSION = 16
+
+
+def align4(offset):
+    return (offset + 3) & ~3
+
+
+def version_node(data, offset, parent_end):
+    # Header of a VS_VERSIONINFO style node: (node end, value length, value start, key); the key is read no further
+    # than parent_end, callers bound the end
+    length, value_length, _ = struct.unpack_from("<HHH", data, offset)
+    key_end = offset + 6
+    while key_end + 1 < parent_end and data[key_end:key_end + 2] != b"\0\0":
+        key_end += 2
+    key = data[offset + 6:key_end].decode("utf-16-le", errors="replace")
+    return offset + length, value_length, align4(key_end + 2), key
+
+
+def parse_version_strings(data):
+    """
+    Parse the StringFileInfo tables of a raw VS_VERSIONINFO resource into {name: value}.
+    Malformed or truncated data yields the strings read up to the damage.
+    """
+    strings = {}
+    if len(data) < 6:
+        return strings
+    root_end, root_value_length, root_value, _ = version_node(data, 0, len(data))
+    # Containers are read as far as the data goes, a string cut short is dropped
+    root_end = min(root_end, len(data))
+    child = align4(root_value + root_value_length)
+
+    while child + 6 <= root_end:
+        child_end, _, child_value, child_key = version_node(data, child, root_end)
+        child_end = min(child_end, root_end)
+        if child_end <= child:
+            break
+        if child_key == "StringFileInfo":
+            table = child_value
+            while table + 6 <= child_end:
+                table_end, _, table_value, _ = version_node(data, table, child_end)
+                table_end = min(table_end, child_end)
+                if table_end <= table:
+                    break
+                string = table_value
+                while string + 6 <= table_end:
+                    string_end, _, string_value, string_key = version_node(data, string, table_end)
+                    if not string < string_end <= table_end:
+                        break
+                    # Value length is in characters for some linkers and in bytes for others, read up to the node end instead
+                    value = data[string_value:string_end].decode("utf-16-le", errors="replace").split("\0", 1)[0]
+                    strings.setdefault(string_key, value)
+                    string = align4(string_end)
+                table = align4(table_end)
+        child = align4(child_end)
+
+    return strings
+
+
+def read_version_strings(file_path):
+    """
+    Read the version strings (ProductName, FileVersion, ...) of a PE file, mapping it instead of reading it whole.
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            pe = PEFile(buffer)
+            for entry in pe.find_resources(RT_VERSION):
+                return parse_version_strings(pe.read(entry))
+    return {}
@@ -0,0 +1,164 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from config import *
+
+
+class SnapshotStore:
+    """
+    Versioned snapshots of the databases refreshed from the network, in GCM Settings/db/snapshots/<name>/.
+    A refresh writes a new version file next to the old ones and fsyncs it, then atomically replaces the "current"
+    pointer of the name. Published versions are never modified, so a reader that resolved the pointer keeps reading
+    one consistent file while later refreshes publish. The newest keep_versions versions are kept for rollback.
+    """
+    keep_versions = 3
+    pointer_name = "current"
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.last_version = 0
+        os.makedirs(root, exist_ok=True)
+
+    def folder(self, name):
+        return os.path.join(self.root, name)
+
+    def versions(self, name):
+        # Published version file names of name, newest first; version names are zero padded nanosecond timestamps
+        try:
+            files = os.listdir(self.folder(name))
+        except FileNotFoundError:
+            return []
+        return sorted((f for f in files if not f.startswith(".") and f != self.pointer_name), reverse=True)
+
+    def current(self, name):
+        # Path of the current version of name, or None if nothing was published yet
+        try:
+            with open(os.path.join(self.folder(name), self.pointer_name), "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        version_file = os.path.join(self.folder(name), version)
+        return version_file if version and os.path.exists(version_file) else None
+
+    @contextmanager
+    def staging(self, name, suffix=""):
+        """
+        Yield the path of a temp file to fill with a new version of name. When the block exits cleanly the file is
+        fsynced, renamed into place and made current; on an exception it is discarded and the current version stays.
+        """
+        folder = self.folder(name)
+        os.makedirs(folder, exist_ok=True)
+        with self.lock:
+            # Strictly increasing even when the clock doesn't advance between two stagings (about 15 ms on Windows)
+            self.last_version = max(time.time_ns(), self.last_version + 1)
+            version = f"{self.last_version:020d}{suffix}"
+        temp_file = os.path.join(folder, f".{version}.tmp")
+        try:
+            yield temp_file
+            self.fsync(temp_file)
+            os.replace(temp_file, os.path.join(folder, version))
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+
+        with self.lock:
+            self.point(name, version)
+            self.prune(name)
+
+    def publish(self, name, write, suffix=""):
+        # Publish a new version of name filled by write(temp file path)
+        with self.staging(name, suffix) as temp_file:
+            write(temp_file)
+
+    def rollback(self, name):
+        # Make the version before the current one current, e.g. when the current one turns out unreadable
+        with self.lock:
+            current = self.current(name)
+            older = [version for version in self.versions(name) if current is None or version < os.path.basename(current)]
+            if not older:
+                return None
+            self.point(name, older[0])
+            return os.path.join(self.folder(name), older[0])
+
+    def adopt(self, name, legacy_file):
+        # Take over a file written in place by earlier versions as the first version of name
+        if not os.path.exists(legacy_file):
+            return
+        if self.current(name) is None:
+            self.publish(name, lambda temp_file: shutil.copyfile(legacy_file, temp_file), os.path.splitext(legacy_file)[1])
+        try:
+            os.remove(legacy_file)
+        except OSError as e:
+            print(f"Error removing {legacy_file}: {str(e)}")
+
+    # ===========================================================================
+    # Text snapshots
+    # ===========================================================================
+    def write_text(self, name, content):
+        def write(temp_file):
+            with open(temp_file, "w", encoding="utf-8") as f:
+                f.write(content)
+        self.publish(name, write, os.path.splitext(name)[1])
+
+    def read_text(self, name):
+        # Retry once in case the resolved version was pruned between resolving and opening it
+        for _ in range(2):
+            version_file = self.current(name)
+            if version_file is None:
+                return ""
+            try:
+                with open(version_file, "r", encoding="utf-8") as f:
+                    return f.read()
+            except FileNotFoundError:
+                continue
+        return ""
+
+    # ===========================================================================
+    # Internals, callers of point and prune hold self.lock
+    # ===========================================================================
+    @staticmethod
+    def fsync(file_path):
+        with open(file_path, "rb+") as f:
+            os.fsync(f.fileno())
+
+    def point(self, name, version):
+        folder = self.folder(name)
+        pointer_file = os.path.join(folder, self.pointer_name)
+        temp_file = os.path.join(folder, f".{self.pointer_name}.{threading.get_ident()}.tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, pointer_file)
+        if os.name != "nt":
+            # Persist the rename itself; directories can't be opened for fsync on Windows
+            directory = os.open(folder, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def prune(self, name):
+        current = self.current(name)
+        current_version = os.path.basename(current) if current else None
+        for version in self.versions(name)[self.keep_versions:]:
+            if version == current_version:
+                continue
+            try:
+                os.remove(os.path.join(self.folder(name), version))
+            except OSError:
+                # Still open by a reader on Windows, removed by a later prune
+                pass
+
+
+snapshot_store = SnapshotStore(os.path.join(DATABASE_PATH, "snapshots"))
+# FLiNG pages were written in place before snapshots
+for legacy_name in ("fling_archive.html", "fling_main.html"):
+    snapshot_store.adopt(legacy_name, os.path.join(DATABASE_PATH, legacy_name))
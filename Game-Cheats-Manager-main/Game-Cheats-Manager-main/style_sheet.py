@@ -111,7 +111,7 @@ white = """
         border-bottom: 2px solid #0057b7;
     }}
 
-    QListWidget {{
+    QListView {{
         border: 1px solid #8c8c8c;
         border-radius: 3px;
         background-color: #fbfbfd;
@@ -322,7 +322,7 @@ black = """
         border-bottom: 2px solid #007ad9;
     }}
 
-    QListWidget {{
+    QListView {{
         border: 1px solid #a8a8a8;
         border-radius: 3px;
         background-color: #2a2a2a;
@@ -0,0 +1,291 @@
+import os
+import shutil
+import struct
+
+import pytest
+
+from pe_resources import PEFile, PEResourceError, RT_VERSION, parse_version_strings, read_version_strings, replace_resource_type
+
+DEPENDENCY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dependency")
+SEVEN_ZIP_EXE = os.path.join(DEPENDENCY_PATH, "7z", "7z.exe")
+SEVEN_ZIP_DLL = os.path.join(DEPENDENCY_PATH, "7z", "7z.dll")
+ELEVATOR_EXE = os.path.join(DEPENDENCY_PATH, "Elevator.exe")
+BINMAY_EXE = os.path.join(DEPENDENCY_PATH, "binmay.exe")
+
+RT_STRING = 6
+RT_GROUP_ICON = 14
+RT_MANIFEST = 24
+
+
+def read_bytes(file_path):
+    with open(file_path, "rb") as f:
+        return bytearray(f.read())
+
+
+def stored_checksum(data):
+    pe = PEFile(data)
+    return struct.unpack_from("<I", data, pe.checksum_offset)[0]
+
+
+def reference_checksum(data):
+    # Straightforward PE checksum: 16 bit word sum with carry folding, checksum field counted as zero, plus length
+    checksum_offset = PEFile(data).checksum_offset
+    length = len(data)
+    data = bytes(data[:checksum_offset]) + bytes(4) + bytes(data[checksum_offset + 4:])
+    if length % 2:
+        data += b"\0"
+    total = 0
+    for word, in struct.iter_unpack("<H", data):
+        total = (total & 0xFFFF) + (total >> 16) + word
+    total = (total & 0xFFFF) + (total >> 16)
+    return total + length
+
+
+def pad(data):
+    return data + bytes(-len(data) % 4)
+
+
+def version_node(key, value=b"", children=(), value_length=None, value_type=1):
+    # Serialize a VS_VERSIONINFO style node; value_length defaults to characters for text and bytes for binary values
+    body = pad(bytes(6) + key.encode("utf-16-le") + b"\0\0") + value
+    if children:
+        body = pad(body) + b"".join(pad(child) for child in children)
+    if value_length is None:
+        value_length = len(value) // 2 if value_type == 1 else len(value)
+    return struct.pack("<HHH", len(body), value_length, value_type) + body[6:]
+
+
+def string_node(key, text, length_in_bytes=False):
+    value = text.encode("utf-16-le") + b"\0\0"
+    return version_node(key, value, value_length=len(value) if length_in_bytes else len(text) + 1)
+
+
+def version_info(string_nodes, extra_children=()):
+    table = version_node("040904B0", children=string_nodes)
+    string_file_info = version_node("StringFileInfo", children=[table])
+    return version_node("VS_VERSION_INFO", bytes(52), children=[string_file_info, *extra_children], value_type=0)
+
+
+@pytest.fixture
+def elevator_copy(tmp_path):
+    file_path = tmp_path / "Elevator.exe"
+    shutil.copyfile(ELEVATOR_EXE, file_path)
+    return str(file_path)
+
+
+# ===========================================================================
+# Resource enumeration
+# ===========================================================================
+def test_resources_of_executable():
+    resources = [(entry.type, entry.name, entry.language, entry.size) for entry in PEFile(read_bytes(SEVEN_ZIP_EXE)).resources()]
+    assert resources == [(RT_VERSION, 1, 1033, 684), (RT_MANIFEST, 1, 1033, 1128)]
+
+
+def test_resources_of_library_with_named_entry():
+    resources = list(PEFile(read_bytes(SEVEN_ZIP_DLL)).resources())
+    assert len(resources) == 85
+
+    types = [entry.type for entry in resources]
+    assert types.count(3) == 56
+    assert types.count(RT_STRING) == 1
+    assert types.count(RT_GROUP_ICON) == 27
+    assert types.count(RT_VERSION) == 1
+
+    # The first icon group is named instead of numbered
+    assert [entry.name for entry in resources if entry.type == RT_GROUP_ICON][0] == "0"
+
+
+def test_resource_data_points_at_the_resource_bytes():
+    data = read_bytes(SEVEN_ZIP_EXE)
+    pe = PEFile(data)
+    manifest, = pe.find_resources(RT_MANIFEST)
+    assert pe.read(manifest).startswith(b"<assembly ")
+
+
+def test_find_resources_matches_names_case_insensitively():
+    pe = PEFile(read_bytes(SEVEN_ZIP_EXE))
+    assert list(pe.find_resources("mid")) == []
+    assert len(list(pe.find_resources(RT_VERSION))) == 1
+
+
+def test_executable_without_resources():
+    assert list(PEFile(read_bytes(BINMAY_EXE)).resources()) == []
+
+
+def test_rejects_non_pe_data():
+    with pytest.raises(PEResourceError):
+        PEFile(bytearray(b"not an executable" * 8))
+
+
+# ===========================================================================
+# In place replacement
+# ===========================================================================
+def test_replace_in_place(elevator_copy):
+    original = read_bytes(ELEVATOR_EXE)
+    replacement = b"<assembly/>"
+
+    assert replace_resource_type(elevator_copy, ["MID", RT_MANIFEST], replacement) == (1, 0)
+
+    data = read_bytes(elevator_copy)
+    assert len(data) == len(original)
+    pe = PEFile(data)
+    manifest, = pe.find_resources(RT_MANIFEST)
+    assert manifest.size == len(replacement)
+    assert pe.read(manifest) == replacement
+    # Leftover bytes of the old resource are zeroed, nothing outside of it changed but the size and checksum fields
+    original_manifest, = PEFile(original).find_resources(RT_MANIFEST)
+    assert data[manifest.data_offset + len(replacement):manifest.data_offset + original_manifest.size] == bytes(original_manifest.size - len(replacement))
+    changed = {index for index, (old, new) in enumerate(zip(original, data)) if old != new}
+    allowed = set(range(manifest.data_offset, manifest.data_offset + original_manifest.size))
+    allowed |= set(range(manifest.data_entry_offset + 4, manifest.data_entry_offset + 8))
+    allowed |= set(range(pe.checksum_offset, pe.checksum_offset + 4))
+    assert changed <= allowed
+
+
+def test_replace_is_idempotent(elevator_copy):
+    replace_resource_type(elevator_copy, [RT_MANIFEST], b"<assembly/>")
+    first = read_bytes(elevator_copy)
+
+    replace_resource_type(elevator_copy, [RT_MANIFEST], b"<assembly/>")
+    assert read_bytes(elevator_copy) == first
+
+
+def test_replace_uses_first_present_type(tmp_path):
+    file_path = str(tmp_path / "7z.exe")
+    shutil.copyfile(SEVEN_ZIP_EXE, file_path)
+
+    assert replace_resource_type(file_path, ["MIDI", RT_MANIFEST, RT_VERSION], b"x") == (1, 0)
+    pe = PEFile(read_bytes(file_path))
+    assert pe.read(next(pe.find_resources(RT_MANIFEST))) == b"x"
+    assert next(pe.find_resources(RT_VERSION)).size == 684
+
+
+def test_replace_skips_resources_too_small(tmp_path):
+    file_path = str(tmp_path / "7z.dll")
+    shutil.copyfile(SEVEN_ZIP_DLL, file_path)
+    original = read_bytes(file_path)
+
+    # Deliberate difference to ResourceHacker: resources too small for the data are kept rather than relaying out the section
+    # Icon groups are 34 bytes except the named one of 62
+    assert replace_resource_type(file_path, [RT_GROUP_ICON], bytes(40)) == (1, 26)
+    pe = PEFile(read_bytes(file_path))
+    original_pe = PEFile(original)
+    groups = list(pe.find_resources(RT_GROUP_ICON))
+    original_groups = list(original_pe.find_resources(RT_GROUP_ICON))
+    assert groups[0].size == 40
+    assert [pe.read(group) for group in groups[1:]] == [original_pe.read(group) for group in original_groups[1:]]
+
+
+def test_replace_without_matching_type_leaves_file_untouched(elevator_copy):
+    assert replace_resource_type(elevator_copy, ["MID", "MIDI"], b"x") == (0, 0)
+    assert read_bytes(elevator_copy) == read_bytes(ELEVATOR_EXE)
+
+
+def test_replace_in_place_rejects_larger_data():
+    pe = PEFile(read_bytes(ELEVATOR_EXE))
+    manifest, = pe.find_resources(RT_MANIFEST)
+    with pytest.raises(PEResourceError):
+        pe.replace_in_place(manifest, bytes(manifest.size + 1))
+
+
+# ===========================================================================
+# Checksum
+# ===========================================================================
+def test_checksum_of_unmodified_file_is_reproduced():
+    data = read_bytes(ELEVATOR_EXE)
+    original = stored_checksum(data)
+    assert original
+
+    PEFile(data).update_checksum()
+    assert stored_checksum(data) == original
+
+
+def test_checksum_recomputed_after_replacement(elevator_copy):
+    original = stored_checksum(read_bytes(ELEVATOR_EXE))
+
+    replace_resource_type(elevator_copy, [RT_MANIFEST], b"<assembly/>")
+    data = read_bytes(elevator_copy)
+    assert stored_checksum(data) != original
+    assert stored_checksum(data) == reference_checksum(data)
+
+
+def test_zero_checksum_is_left_alone(tmp_path):
+    # Unsigned tools often ship without a checksum, the loader ignores it then and so do we
+    file_path = str(tmp_path / "7z.exe")
+    shutil.copyfile(SEVEN_ZIP_EXE, file_path)
+    assert stored_checksum(read_bytes(file_path)) == 0
+
+    replace_resource_type(file_path, [RT_MANIFEST], b"x")
+    assert stored_checksum(read_bytes(file_path)) == 0
+
+
+# ===========================================================================
+# Version strings
+# ===========================================================================
+SEVEN_ZIP_VERSION_STRINGS = {
+    "CompanyName": "Igor Pavlov",
+    "FileDescription": "7-Zip Console",
+    "FileVersion": "24.06",
+    "InternalName": "7z",
+    "LegalCopyright": "Copyright (c) 1999-2024 Igor Pavlov",
+    "OriginalFilename": "7z.exe",
+    "ProductName": "7-Zip",
+    "ProductVersion": "24.06",
+}
+
+
+def seven_zip_version_blob():
+    pe = PEFile(read_bytes(SEVEN_ZIP_EXE))
+    return pe.read(next(pe.find_resources(RT_VERSION)))
+
+
+def test_version_strings_of_real_resource():
+    assert parse_version_strings(seven_zip_version_blob()) == SEVEN_ZIP_VERSION_STRINGS
+
+
+def test_read_version_strings_from_file():
+    assert read_version_strings(SEVEN_ZIP_EXE) == SEVEN_ZIP_VERSION_STRINGS
+    assert read_version_strings(ELEVATOR_EXE) == {}
+
+
+def test_version_strings_of_built_resource():
+    data = version_info([string_node("ProductName", "Elden Ring Trainer"), string_node("FileVersion", "1.0.0.1")])
+    assert parse_version_strings(data) == {"ProductName": "Elden Ring Trainer", "FileVersion": "1.0.0.1"}
+
+
+def test_value_length_in_bytes_or_characters():
+    in_characters = version_info([string_node("ProductName", "Trainer"), string_node("Comments", "FLiNG")])
+    in_bytes = version_info([string_node("ProductName", "Trainer", True), string_node("Comments", "FLiNG", True)])
+    assert parse_version_strings(in_characters) == parse_version_strings(in_bytes) == {"ProductName": "Trainer", "Comments": "FLiNG"}
+
+
+def test_var_file_info_is_ignored():
+    translation = version_node("VarFileInfo", children=[version_node("Translation", struct.pack("<HH", 0x409, 1200), value_type=0)])
+    data = version_info([string_node("ProductName", "Trainer")], [translation])
+    assert parse_version_strings(data) == {"ProductName": "Trainer"}
+
+
+def test_zero_length_node_stops_parsing():
+    zero_length = struct.pack("<HHH", 0, 0, 1) + pad("Broken".encode("utf-16-le") + b"\0\0")
+    data = version_info([string_node("ProductName", "Trainer"), zero_length, string_node("Comments", "unreached")])
+    assert parse_version_strings(data) == {"ProductName": "Trainer"}
+
+
+def test_overlong_node_is_clamped_to_its_parent():
+    data = bytearray(version_info([string_node("ProductName", "Trainer")]))
+    # Claim the root is far longer than the resource
+    struct.pack_into("<H", data, 0, 0xFFFF)
+    assert parse_version_strings(bytes(data)) == {"ProductName": "Trainer"}
+
+
+@pytest.mark.parametrize("length", range(0, 684, 7))
+def test_truncated_resource(length):
+    strings = parse_version_strings(seven_zip_version_blob()[:length])
+    # Whatever was read before the cut is a prefix of the real table, with complete values
+    assert strings == {key: SEVEN_ZIP_VERSION_STRINGS[key] for key in list(SEVEN_ZIP_VERSION_STRINGS)[:len(strings)]}
+
+
+def test_garbage_is_not_an_error():
+    assert parse_version_strings(b"") == {}
+    assert parse_version_strings(bytes(3)) == {}
+    assert parse_version_strings(bytes(range(256)) * 4) == {}
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+# config needs the application's dependencies and settings folder
+pytest.importorskip("config")
+from snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots"))
+
+
+def write(content):
+    def write_file(temp_file):
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(content)
+    return write_file
+
+
+def read(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def leftovers(store, name):
+    return [f for f in os.listdir(store.folder(name)) if f.startswith(".") and f.endswith(".tmp")]
+
+
+# ===========================================================================
+# Publishing
+# ===========================================================================
+def test_nothing_published(store):
+    assert store.current("page.html") is None
+    assert store.versions("page.html") == []
+    assert store.read_text("page.html") == ""
+
+
+def test_publish_makes_new_version_current(store):
+    store.publish("catalog", write("first"), ".db")
+    first = store.current("catalog")
+    store.publish("catalog", write("second"), ".db")
+    second = store.current("catalog")
+
+    assert first != second and second.endswith(".db")
+    assert read(first) == "first"
+    assert read(second) == "second"
+    assert store.versions("catalog") == [os.path.basename(second), os.path.basename(first)]
+    assert leftovers(store, "catalog") == []
+
+
+def test_text_round_trip(store):
+    store.write_text("fling_main.html", "<html>1</html>")
+    store.write_text("fling_main.html", "<html>2</html>")
+    assert store.read_text("fling_main.html") == "<html>2</html>"
+    assert store.current("fling_main.html").endswith(".html")
+
+
+def test_failed_staging_is_discarded(store):
+    store.publish("catalog", write("good"))
+    good = store.current("catalog")
+
+    with pytest.raises(RuntimeError):
+        with store.staging("catalog") as temp_file:
+            write("half written")(temp_file)
+            raise RuntimeError("page missing")
+
+    assert store.current("catalog") == good
+    assert store.versions("catalog") == [os.path.basename(good)]
+    assert leftovers(store, "catalog") == []
+
+
+def test_old_versions_are_pruned(store):
+    for index in range(5):
+        store.write_text("page.html", str(index))
+    versions = store.versions("page.html")
+
+    assert len(versions) == store.keep_versions
+    assert [read(os.path.join(store.folder("page.html"), version)) for version in versions] == ["4", "3", "2"]
+
+
+def test_versions_are_unique_within_a_clock_tick(store, monkeypatch):
+    # The Windows clock advances in steps of about 15 ms, two publishes can read the same time
+    monkeypatch.setattr("snapshot_store.time.time_ns", lambda: 1_000_000_000)
+    store.write_text("page.html", "first")
+    first = store.current("page.html")
+    store.write_text("page.html", "second")
+
+    assert store.current("page.html") != first
+    assert read(first) == "first"
+    assert store.read_text("page.html") == "second"
+
+
+# ===========================================================================
+# Rollback and adoption
+# ===========================================================================
+def test_rollback_to_previous_version(store):
+    store.write_text("page.html", "old")
+    store.write_text("page.html", "new")
+
+    previous = store.rollback("page.html")
+    assert store.current("page.html") == previous
+    assert store.read_text("page.html") == "old"
+
+    # Nothing older left
+    assert store.rollback("page.html") is None
+    assert store.read_text("page.html") == "old"
+
+
+def test_adopt_legacy_file(store, tmp_path):
+    legacy_file = tmp_path / "fling_archive.html"
+    legacy_file.write_text("legacy", encoding="utf-8")
+
+    store.adopt("fling_archive.html", str(legacy_file))
+    assert store.read_text("fling_archive.html") == "legacy"
+    assert not legacy_file.exists()
+
+
+def test_adopt_keeps_published_version(store, tmp_path):
+    store.write_text("fling_archive.html", "published")
+    legacy_file = tmp_path / "fling_archive.html"
+    legacy_file.write_text("legacy", encoding="utf-8")
+
+    store.adopt("fling_archive.html", str(legacy_file))
+    assert store.read_text("fling_archive.html") == "published"
+    assert not legacy_file.exists()
@@ -0,0 +1,194 @@
+import json
+from contextlib import closing
+
+import pytest
+
+# config and the url derivation need the application's dependencies
+pytest.importorskip("config")
+pytest.importorskip("cn2an")
+from snapshot_store import SnapshotStore
+from trainer_catalog import CatalogBuilder, TrainerCatalog
+
+
+def entry(id, en_name, keyw="", title="", version="v1.0", keyv="v1.0 十二项修改器", anti_url=""):
+    return {"id": id, "title": title or keyw, "en_name": en_name, "keyw": keyw, "keyv": keyv, "version": version,
+            "anti_url": anti_url}
+
+
+def rows(connection):
+    return [tuple(row) for row in connection.execute("SELECT id, en_name, keyw, page FROM trainers ORDER BY id, rowid")]
+
+
+@pytest.fixture
+def connection():
+    with closing(TrainerCatalog.connect(":memory:")) as connection:
+        TrainerCatalog.migrate(connection)
+        yield connection
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots"))
+
+
+def publish_catalog(store, entries=()):
+    def write(temp_file):
+        with closing(TrainerCatalog.connect(temp_file)) as connection, connection:
+            TrainerCatalog.migrate(connection)
+            CatalogBuilder(connection).add_page(entries, 1)
+    store.publish(TrainerCatalog.snapshot_name, write, ".db")
+    return store.current(TrainerCatalog.snapshot_name)
+
+
+# ===========================================================================
+# Download fields
+# ===========================================================================
+def test_download_fields():
+    failures = []
+    fields = TrainerCatalog.download_fields(
+        entry(1, "Story of Seasons: A Wonderful Life", title="牧场物语 美好生活 v1.0-v1.2 十二项修改器", keyv="v1.0 二十四项修改器"),
+        failures)
+
+    assert fields == (
+        "",
+        "https://down.fucnm.com/Story.of.Seasons.A.Wonderful.Life.v1.0.Plus.24.Trainer-FLiNG.zip",
+        "Story of Seasons: A Wonderful Life Trainer",
+        "《牧场物语 美好生活》修改器",
+    )
+    assert failures == []
+
+
+def test_download_fields_early_access():
+    _, download_url, _, display_zh = TrainerCatalog.download_fields(
+        entry(1, "Palworld", keyw="幻兽帕鲁", title="幻兽帕鲁 Early Access 十二项修改器", version="Early Access"), [])
+    assert download_url == "https://down.fucnm.com/Palworld.Early.Access.Plus.12.Trainer-FLiNG.zip"
+    assert display_zh == "《幻兽帕鲁》修改器"
+
+
+def test_rar_anti_cheat_bypass_is_dropped():
+    anti_url, *_ = TrainerCatalog.download_fields(entry(1, "Game", anti_url="https://example.com/files/bypass.rar"), [])
+    assert anti_url == ""
+
+    anti_url, *_ = TrainerCatalog.download_fields(entry(1, "Game", anti_url="https://example.com/files/bypass.zip"), [])
+    assert anti_url == "https://example.com/files/bypass.zip"
+
+
+def test_url_without_option_count_is_reported():
+    failures = []
+    _, download_url, display_en, _ = TrainerCatalog.download_fields(
+        entry(1, "Final Fantasy X", keyw="最终幻想10", keyv="v1.0 存档修改器"), failures)
+
+    assert download_url is None
+    assert display_en == "Final Fantasy X Trainer"
+    assert failures == [("最终幻想10", "no option count in 'v1.0 存档修改器'")]
+
+
+def test_local_additions_are_not_downloadable():
+    assert TrainerCatalog.download_fields({"en_name": "Game", "keyw": "游戏"}, []) == ("", None, None, None)
+
+
+# ===========================================================================
+# Duplicate ids and local additions
+# ===========================================================================
+def test_duplicate_id_keeps_entry_of_lowest_page(connection):
+    builder = CatalogBuilder(connection)
+    builder.add_page([entry(1, "From Page 3"), entry(2, "Only")], 3)
+    builder.add_page([entry(1, "From Page 2")], 2)
+    builder.add_page([entry(1, "From Page 4")], 4)
+
+    assert rows(connection) == [(1, "From Page 2", "", 2), (2, "Only", "", 3)]
+
+
+def test_duplicate_id_within_page_keeps_first_entry(connection):
+    CatalogBuilder(connection).add_page([entry(1, "First"), entry(1, "Second")], 1)
+    assert rows(connection) == [(1, "First", "", 1)]
+
+
+def test_import_resolves_duplicates_like_refresh(connection, tmp_path):
+    pages = [[entry(1, "First"), entry(2, "Other")], [entry(1, "Second")]]
+    additions = [{"en_name": "Extra", "keyw": "旧"}, {"en_name": "Extra", "keyw": "新"}]
+    legacy_json = tmp_path / "xgqdetail.json"
+    legacy_json.write_text(json.dumps(pages[0] + pages[1] + additions), encoding="utf-8")
+
+    TrainerCatalog.import_legacy(connection, str(legacy_json))
+
+    with closing(TrainerCatalog.connect(":memory:")) as refreshed:
+        TrainerCatalog.migrate(refreshed)
+        builder = CatalogBuilder(refreshed)
+        for page, entries in reversed(list(enumerate(pages, 1))):
+            builder.add_page(entries, page)
+        builder.add_overlay(additions)
+        expected = [row[:3] for row in rows(refreshed)]
+
+    assert [row[:3] for row in rows(connection)] == expected == [(None, "Extra", "新"), (1, "First", ""), (2, "Other", "")]
+
+
+def test_overlay_replaces_earlier_addition(connection):
+    builder = CatalogBuilder(connection)
+    builder.add_page([entry(1, "Elden Ring", keyw="艾尔登法环")], 1)
+    builder.add_overlay([{"en_name": "Elden Ring", "keyw": "老头环"}, {"en_name": "Hades", "keyw": "哈迪斯"}])
+    builder.add_overlay([{"en_name": "Hades", "keyw": "黑帝斯"}])
+
+    assert rows(connection) == [(None, "Elden Ring", "老头环", None), (None, "Hades", "黑帝斯", None),
+                                (1, "Elden Ring", "艾尔登法环", 1)]
+
+
+# ===========================================================================
+# Snapshots
+# ===========================================================================
+def test_search_returns_downloadable_trainers(store):
+    publish_catalog(store, [
+        entry(1, "Elden Ring", keyw="艾尔登法环", title="艾尔登法环 v1.02 十二项修改器", anti_url="https://example.com/a.rar"),
+        entry(2, "Final Fantasy X", keyw="最终幻想10", keyv="v1.0 存档修改器"),
+    ])
+
+    with TrainerCatalog(store).snapshot() as snapshot:
+        assert snapshot.has_entries()
+        assert snapshot.search("艾尔登") == [
+            ("Elden Ring Trainer", "https://down.fucnm.com/Elden.Ring.v1.0.Plus.12.Trainer-FLiNG.zip", "")]
+        assert snapshot.search("elden", chinese_names=True)[0][0] == "《艾尔登法环》修改器"
+        # No download url could be derived
+        assert snapshot.search("最终幻想") == []
+        assert snapshot.en_names_for_keyword("最终幻想") == ["Final Fantasy X"]
+
+
+def test_corrupt_current_version_is_rolled_back(store):
+    good = publish_catalog(store, [entry(1, "Elden Ring", keyw="艾尔登法环")])
+
+    def write_garbage(temp_file):
+        with open(temp_file, "wb") as f:
+            f.write(b"not a database" * 512)
+    store.publish(TrainerCatalog.snapshot_name, write_garbage, ".db")
+    assert store.current(TrainerCatalog.snapshot_name) != good
+
+    catalog = TrainerCatalog(store)
+    assert store.current(TrainerCatalog.snapshot_name) == good
+    with catalog.snapshot() as snapshot:
+        assert snapshot.en_names_for_keyword("艾尔登") == ["Elden Ring"]
+
+
+def test_failed_build_keeps_current_catalog(store):
+    current = publish_catalog(store, [entry(1, "Elden Ring", keyw="艾尔登法环")])
+    catalog = TrainerCatalog(store)
+
+    with pytest.raises(RuntimeError):
+        with catalog.build() as builder:
+            builder.add_page([entry(2, "Hades", keyw="哈迪斯")], 1)
+            raise RuntimeError("page missing")
+
+    assert store.current(TrainerCatalog.snapshot_name) == current
+    with catalog.snapshot() as snapshot:
+        assert snapshot.en_names_for_keyword("哈迪斯") == []
+
+
+def test_build_publishes_new_catalog(store):
+    publish_catalog(store, [entry(1, "Elden Ring", keyw="艾尔登法环")])
+    catalog = TrainerCatalog(store)
+
+    with catalog.build() as builder:
+        builder.add_page([entry(2, "Hades", keyw="哈迪斯")], 1)
+        builder.add_overlay([{"en_name": "Hades", "keyw": "黑帝斯"}])
+
+    with catalog.snapshot() as snapshot:
+        assert snapshot.en_names_for_keyword("艾尔登") == []
+        assert snapshot.keyw_by_en_key() == {"hades": "黑帝斯"}
@@ -0,0 +1,295 @@
+import json
+import os
+import pathlib
+import re
+import sqlite3
+from contextlib import closing, contextmanager
+from urllib.parse import urlparse
+
+import cn2an
+
+from config import *
+from snapshot_store import snapshot_store
+
+
+class TrainerCatalog:
+    """
+    Trainer details from the 3DM database (xgqdetail), kept as SQLite snapshots in the snapshot store.
+    Replaces the indented xgqdetail.json: only the fields the app reads are kept, one row per trainer, with the
+    sanitized English name stored alongside so name matching doesn't re-sanitize the whole catalog per lookup.
+    China server download urls and display names are derived once when rows are written, searches only select them.
+    Rows without an id are the local additions, they only serve keyword translation.
+    A refresh streams a complete new database file page by page and publishes it; readers open the current one read-only.
+    """
+    schema_version = 1
+    snapshot_name = "catalog"
+    columns = ("id", "title", "en_name", "en_key", "keyw", "keyv", "version", "anti_url",
+               "download_url", "display_en", "display_zh")
+
+    def __init__(self, store):
+        self.store = store
+        self.prepare()
+
+    @staticmethod
+    def connect(db_file, read_only=False):
+        if read_only:
+            # immutable: the snapshot never changes, so SQLite skips locking and change detection entirely
+            connection = sqlite3.connect(pathlib.Path(db_file).as_uri() + "?mode=ro&immutable=1", uri=True)
+        else:
+            connection = sqlite3.connect(db_file)
+        connection.row_factory = sqlite3.Row
+        # Unicode aware lower() for English name searches, SQLite's own only folds ASCII
+        connection.create_function("lower", 1, str.lower, deterministic=True)
+        return connection
+
+    @classmethod
+    def read_version(cls, db_file):
+        # Schema version of a database file, None if it can't be read
+        try:
+            with closing(cls.connect(db_file, read_only=True)) as connection:
+                connection.execute("SELECT count(*) FROM sqlite_master").fetchone()
+                return connection.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            print(f"Error reading trainer catalog {db_file}: {str(e)}")
+            return None
+
+    def prepare(self):
+        """
+        Make sure a current snapshot with the current schema exists. An unreadable snapshot is rolled back to the
+        previous version; without a usable one the legacy xgqdetail.json or the bundled one is imported.
+        """
+        current = self.store.current(self.snapshot_name)
+        while current and self.read_version(current) is None:
+            current = self.store.rollback(self.snapshot_name)
+        if current and self.read_version(current) == self.schema_version:
+            return
+
+        legacy_json = os.path.join(DATABASE_PATH, "xgqdetail.json")
+
+        def write(temp_file):
+            with closing(self.connect(temp_file)) as connection, connection:
+                self.migrate(connection)
+                self.import_legacy(connection, legacy_json)
+        self.store.publish(self.snapshot_name, write, ".db")
+
+        if os.path.exists(legacy_json):
+            try:
+                os.remove(legacy_json)
+            except OSError as e:
+                print(f"Error removing {legacy_json}: {str(e)}")
+
+    @classmethod
+    def migrate(cls, connection):
+        # Bring an open, writable catalog to the current schema inside the caller's transaction
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS trainers (
+                    id INTEGER,
+                    title TEXT NOT NULL DEFAULT '',
+                    en_name TEXT NOT NULL DEFAULT '',
+                    en_key TEXT NOT NULL DEFAULT '',
+                    keyw TEXT NOT NULL DEFAULT '',
+                    keyv TEXT NOT NULL DEFAULT '',
+                    version TEXT NOT NULL DEFAULT '',
+                    anti_url TEXT NOT NULL DEFAULT '',
+                    download_url TEXT,
+                    display_en TEXT,
+                    display_zh TEXT,
+                    page INTEGER  -- upstream page the row was fetched from, resolves ids listed on several pages
+                )
+            """)
+            connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS trainers_id ON trainers (id)")
+            connection.execute("CREATE INDEX IF NOT EXISTS trainers_en_key ON trainers (en_key)")
+            # Local additions are an overlay keyed by English name, one row per name
+            connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS trainers_overlay ON trainers (en_key) WHERE id IS NULL")
+        connection.execute(f"PRAGMA user_version = {cls.schema_version}")
+
+    @classmethod
+    def import_legacy(cls, connection, legacy_json):
+        # First catalog: the xgqdetail.json of earlier versions if present (it may be fresher), else the bundled copy
+        for source in (legacy_json, resource_path("dependency/xgqdetail.json")):
+            try:
+                with open(source, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"Error importing trainer details from {source}: {str(e)}")
+                continue
+            # The json holds the fetched pages in order followed by the local additions, load it the way a refresh does
+            builder = CatalogBuilder(connection)
+            builder.add_page([entry for entry in entries if entry.get("id") is not None], 1)
+            builder.add_overlay(entry for entry in entries if entry.get("id") is None)
+            cls.report_failures(builder.failures)
+            break
+
+    @staticmethod
+    def download_fields(entry, failures):
+        """
+        Derive (anti_url, download_url, display_en, display_zh) of a downloadable entry.
+        Entries whose url can't be constructed get no download_url and are appended to failures as (name, error).
+        """
+        if entry.get("id") is None:
+            return "", None, None, None
+
+        # Anti-cheat bypasses packed as rar can't be extracted
+        anti_url = entry.get("anti_url") or ""
+        if os.path.splitext(urlparse(anti_url).path)[1] == ".rar":
+            anti_url = ""
+
+        display_en = f"{entry.get('en_name', '')} Trainer"
+        pattern = r'\s(v[\d\.v\-]+.*|Early ?Access.*)'
+        display_zh = f"《{re.sub(pattern, '', entry.get('title', ''))}》修改器"
+
+        try:
+            # Construct download url, example: https://down.fucnm.com/Story.of.Seasons.A.Wonderful.Life.v1.0.Plus.24.Trainer-FLiNG.zip
+            base_url = "https://down.fucnm.com/"
+            trainer_name = entry["en_name"].replace(": ", ".").replace("：", ".").replace(",", "").replace("'", "").replace("’", "").replace("?", "").replace("/", ".").replace(" - ", ".").replace(" ", ".")
+            version = entry["version"]
+            if sanitize(version) == "earlyaccess":
+                version = "Early.Access"
+
+            countMatch = re.search(r"(\w+?)项", entry["keyv"])
+            if not countMatch:
+                raise ValueError(f"no option count in {entry['keyv']!r}")
+            count = cn2an.cn2an(countMatch.group(1), "smart")
+            download_url = f"{base_url}{trainer_name}.{version}.Plus.{count}.Trainer-FLiNG.zip"
+        except Exception as e:
+            failures.append((entry.get("keyw") or entry.get("en_name", ""), str(e)))
+            download_url = None
+
+        return anti_url, download_url, display_en, display_zh
+
+    @classmethod
+    def normalize(cls, entry, failures):
+        # Raw xgqdetail entry to a row tuple in column order
+        anti_url, download_url, display_en, display_zh = cls.download_fields(entry, failures)
+        return (
+            entry.get("id"),
+            entry.get("title", ""),
+            entry.get("en_name", ""),
+            sanitize(entry.get("en_name", "")),
+            entry.get("keyw", ""),
+            entry.get("keyv", ""),
+            entry.get("version", ""),
+            anti_url,
+            download_url,
+            display_en,
+            display_zh,
+        )
+
+    @classmethod
+    def insert_page(cls, connection, entries, page):
+        """
+        Insert one fetched page inside the caller's transaction. Pages arrive in any order; an id listed on several
+        pages keeps the entry of the lowest page (the first one within a page), so the result doesn't depend on timing.
+        Returns the [(name, error)] of entries whose download url couldn't be derived.
+        """
+        failures = []
+        columns = cls.columns + ("page",)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+        connection.executemany(f"""
+            INSERT OR IGNORE INTO trainers ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT (id) DO UPDATE SET {updates} WHERE excluded.page < trainers.page
+        """, (cls.normalize(entry, failures) + (page,) for entry in entries))
+        return failures
+
+    @contextmanager
+    def build(self):
+        """
+        Build a new catalog from a refresh: yields a CatalogBuilder writing into a staged snapshot, which is published
+        when the block exits cleanly and discarded on an exception. Searches keep using their snapshot meanwhile.
+        """
+        with self.store.staging(self.snapshot_name, ".db") as temp_file:
+            with closing(self.connect(temp_file)) as connection, connection:
+                self.migrate(connection)
+                builder = CatalogBuilder(connection)
+                yield builder
+        self.report_failures(builder.failures)
+
+    @staticmethod
+    def report_failures(failures):
+        for name, error in failures:
+            print(f"Constructing download url for {name} failed: {error}")
+
+    def snapshot(self):
+        return CatalogSnapshot(self.store.current(self.snapshot_name))
+
+
+class CatalogBuilder:
+    """
+    Writes a catalog as a refresh fetches it, so only the page at hand is held in memory.
+    The indexes exist from the start and are maintained row by row, there is no bulk index build at the end.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.failures = []  # [(name, error)] of entries whose download url couldn't be derived
+
+    def add_page(self, entries, page):
+        self.failures.extend(TrainerCatalog.insert_page(self.connection, entries, page))
+
+    def add_overlay(self, additions):
+        # Local additions keyed by English name: a later addition for the same name replaces the earlier one
+        self.connection.executemany("""
+            INSERT INTO trainers (en_name, en_key, keyw) VALUES (?, ?, ?)
+            ON CONFLICT (en_key) WHERE id IS NULL DO UPDATE SET en_name = excluded.en_name, keyw = excluded.keyw
+        """, ((addition["en_name"], sanitize(addition["en_name"]), addition["keyw"]) for addition in additions))
+
+
+class CatalogSnapshot:
+    """
+    Read-only handle on one published catalog version, used as a context manager for the duration of a search.
+    The version file is never modified, so lookups need no locking and all see the same catalog even while a
+    refresh publishes a new one.
+    """
+
+    def __init__(self, db_file):
+        if db_file:
+            self.connection = TrainerCatalog.connect(db_file, read_only=True)
+        else:
+            # Nothing published (first catalog failed to build), behave as an empty catalog
+            self.connection = TrainerCatalog.connect(":memory:")
+            TrainerCatalog.migrate(self.connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.close()
+
+    # ===========================================================================
+    # Lookups
+    # ===========================================================================
+    def has_entries(self):
+        return self.connection.execute("SELECT 1 FROM trainers LIMIT 1").fetchone() is not None
+
+    def keyw_by_en_key(self):
+        # {sanitized English name: Chinese keyword} for fuzzy matching trainer names
+        rows = self.connection.execute("SELECT en_key, keyw FROM trainers ORDER BY rowid").fetchall()
+        return {row["en_key"]: row["keyw"] for row in rows}
+
+    def en_names_for_keyword(self, keyword):
+        # English names of the trainers whose Chinese keyword contains keyword
+        rows = self.connection.execute(
+            "SELECT en_name FROM trainers WHERE instr(keyw, ?) > 0 ORDER BY rowid", (keyword,)
+        ).fetchall()
+        return [row["en_name"] for row in rows]
+
+    def search(self, keyword, chinese_names=False):
+        """
+        Downloadable trainers whose Chinese keyword contains keyword, or whose English name contains it
+        case-insensitively for keywords of two characters or more.
+        Returns [(display name, download url, anti-cheat bypass url or "")], with Chinese display names if chinese_names.
+        """
+        display_column = "display_zh" if chinese_names else "display_en"
+        rows = self.connection.execute(f"""
+            SELECT {display_column}, download_url, anti_url FROM trainers
+            WHERE download_url IS NOT NULL AND (instr(keyw, ?) > 0 OR (length(?) >= 2 AND instr(lower(en_name), lower(?)) > 0))
+            ORDER BY rowid
+        """, (keyword, keyword, keyword)).fetchall()
+        return [tuple(row) for row in rows]
+
+
+trainer_catalog = TrainerCatalog(snapshot_store)